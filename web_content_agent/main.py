@@ -6,24 +6,22 @@ Web Content Agent 主程序
 
 import os
 import sys
+import queue
+import atexit
 import logging
 import argparse
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional, Dict, Any
 from pathlib import Path
-from dotenv import load_dotenv
-
-# 加载环境变量
-load_dotenv()
+from functools import cached_property
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
 
-from src.crawler.web_crawler import WebCrawler
-from src.processor.content_processor import ContentProcessor
-from src.prompt.prompt_manager import PromptManager
-from src.ai.bailian_client import BailianClient, BailianConfig
-from src.formatter.output_formatter import OutputFormatter, OutputFormat
+# 爬虫、解析、模板和AI客户端依赖较重（requests、lxml、yaml），在Agent首次用到时才导入
+from src.formatter.output_formatter import OutputFormatter, OutputFormat, FORMAT_MAP
 
 
 class WebContentAgent:
@@ -34,6 +32,9 @@ class WebContentAgent:
         """
         初始化Agent
         
+        各个模块在首次使用时才创建，只调用list_templates()或test_connection()时
+        不会建立爬虫会话或加载其他模块。
+        
         Args:
             api_key: 阿里云百炼API密钥
             model: 使用的模型名称
@@ -41,23 +42,44 @@ class WebContentAgent:
         """
         self.api_key = api_key
         self.model = model
+        self.templates_dir = templates_dir
         
-        # 初始化各个模块
-        self.crawler = WebCrawler()
-        self.processor = ContentProcessor()
-        self.prompt_manager = PromptManager(templates_dir)
-        self.formatter = OutputFormatter()
-        
-        # 初始化AI客户端
+        self.logger = logging.getLogger(__name__)
+    
+    @cached_property
+    def crawler(self):
+        """网页爬虫"""
+        from src.crawler.web_crawler import WebCrawler
+        return WebCrawler()
+    
+    @cached_property
+    def processor(self):
+        """内容处理器"""
+        from src.processor.content_processor import ContentProcessor
+        return ContentProcessor()
+    
+    @cached_property
+    def prompt_manager(self):
+        """提示词管理器"""
+        from src.prompt.prompt_manager import PromptManager
+        return PromptManager(self.templates_dir)
+    
+    @cached_property
+    def formatter(self) -> OutputFormatter:
+        """输出格式化器"""
+        return OutputFormatter()
+    
+    @cached_property
+    def ai_client(self):
+        """AI客户端"""
+        from src.ai.bailian_client import BailianClient, BailianConfig
         config = BailianConfig(
-            api_key=api_key,
-            model=model,
+            api_key=self.api_key,
+            model=self.model,
             temperature=0.7,
             max_tokens=2000
         )
-        self.ai_client = BailianClient(config)
-        
-        self.logger = logging.getLogger(__name__)
+        return BailianClient(config)
     
     def process_url(self, url: str, template_name: str = "summary",
                    output_format: str = "markdown", **kwargs) -> Dict[str, Any]:
@@ -138,13 +160,7 @@ class WebContentAgent:
             metadata.update(ai_metadata)
             
             # 确定输出格式
-            format_enum = OutputFormat.MARKDOWN
-            if output_format.lower() == "html":
-                format_enum = OutputFormat.HTML
-            elif output_format.lower() == "text":
-                format_enum = OutputFormat.TEXT
-            elif output_format.lower() == "json":
-                format_enum = OutputFormat.JSON
+            format_enum = FORMAT_MAP.get(output_format.lower(), OutputFormat.MARKDOWN)
             
             formatted_content = self.formatter.format_content(
                 generated_content, format_enum, metadata
@@ -168,26 +184,42 @@ class WebContentAgent:
             return result
     
     def process_multiple_urls(self, urls: list, template_name: str = "summary",
-                            output_format: str = "markdown", **kwargs) -> Dict[str, Dict[str, Any]]:
+                            output_format: str = "markdown", concurrency: int = 8,
+                            **kwargs) -> Dict[str, Dict[str, Any]]:
         """
         批量处理多个URL
         
+        爬取和AI调用都是网络等待，多个URL在线程池中并发处理，
+        各线程共享爬虫和AI客户端的连接池。
+        
         Args:
             urls: URL列表
             template_name: 使用的提示词模板
             output_format: 输出格式
+            concurrency: 最大并发数
             **kwargs: 其他参数
             
         Returns:
-            Dict[str, Dict[str, Any]]: 每个URL的处理结果
+            Dict[str, Dict[str, Any]]: 每个URL的处理结果，顺序与输入一致
         """
         results = {}
         
-        for i, url in enumerate(urls):
-            self.logger.info(f"处理URL {i+1}/{len(urls)}: {url}")
-            results[url] = self.process_url(url, template_name, output_format, **kwargs)
+        # 在启动线程前创建共享组件，避免多个线程同时初始化
+        for name in ('crawler', 'processor', 'prompt_manager', 'formatter', 'ai_client'):
+            getattr(self, name)
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            futures = {
+                executor.submit(self.process_url, url, template_name, output_format, **kwargs): url
+                for url in dict.fromkeys(urls)
+            }
+            
+            for i, future in enumerate(as_completed(futures), 1):
+                url = futures[future]
+                results[url] = future.result()
+                self.logger.info(f"已完成URL {i}/{len(futures)}: {url}")
         
-        return results
+        return {url: results[url] for url in urls}
     
     def list_templates(self) -> list:
         """列出所有可用的提示词模板"""
@@ -208,8 +240,8 @@ class WebContentAgent:
             output_path = Path(output_file)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_path, 'w', encoding='utf-8') as f:
-                f.write(result['content'])
+            # 一次性编码后单次写入，不经过文本模式的换行转换
+            output_path.write_bytes(result['content'].encode('utf-8'))
             
             self.logger.info(f"结果已保存到: {output_path}")
             
@@ -218,22 +250,38 @@ class WebContentAgent:
     
     def close(self):
         """关闭所有资源"""
-        if hasattr(self, 'crawler'):
+        # 只关闭已经创建的组件
+        if 'crawler' in self.__dict__:
             self.crawler.close()
-        if hasattr(self, 'ai_client'):
+        if 'ai_client' in self.__dict__:
             self.ai_client.close()
 
 
 def setup_logging(log_level: str = "INFO"):
-    """设置日志配置"""
+    """设置日志配置，日志先进入队列，由后台线程写入控制台和文件"""
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    handlers = [
+        logging.StreamHandler(sys.stdout),
+        logging.FileHandler('web_content_agent.log', encoding='utf-8')
+    ]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.Queue(-1)
+    listener = QueueListener(log_queue, *handlers)
+    
+    # 入队时只合并消息参数，完整格式由后台线程中的handler负责
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    
     logging.basicConfig(
         level=getattr(logging, log_level.upper()),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(sys.stdout),
-            logging.FileHandler('web_content_agent.log', encoding='utf-8')
-        ]
+        handlers=[queue_handler]
     )
+    
+    listener.start()
+    # 退出前把队列中剩余的日志写完
+    atexit.register(listener.stop)
 
 
 def main():
@@ -256,8 +304,14 @@ def main():
     # 解析参数
     args = parser.parse_args()
     
-    # 获取API密钥：优先使用命令行参数，其次使用环境变量
-    api_key = args.api_key or os.getenv('BAILIAN_API_KEY')
+    # 获取API密钥：优先使用命令行参数，其次使用环境变量，最后读取 .env 文件
+    api_key = args.api_key or os.environ.get('BAILIAN_API_KEY')
+    env_file = project_root / '.env'
+    if not api_key and env_file.exists():
+        from dotenv import load_dotenv
+        load_dotenv(env_file)
+        api_key = os.environ.get('BAILIAN_API_KEY')
+    
     if not api_key:
         print("❌ 错误：未找到API密钥！")
         print("请通过以下方式之一提供API密钥：")
@@ -1,14 +1,105 @@
+import re
 import json
 import time
+import asyncio
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any, Tuple
+import threading
+import http.client
+import importlib.util
+from typing import Dict, List, Optional, Any, Tuple, NamedTuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-import requests
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+from functools import lru_cache
+from urllib.parse import urlparse
+from email.utils import parsedate_to_datetime
+
+try:
+    import httpx
+except ImportError:  # 可选依赖，仅AsyncBailianClient需要
+    httpx = None
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+except ImportError:  # 可选依赖，未安装时使用标准库json
+    _json_loads = json.loads
+    
+    def _json_dumps(obj: Any) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
 
 logger = logging.getLogger(__name__)
 
+# 中文字符（CJK统一表意文字）
+_CJK_PATTERN = re.compile(r'[\u4e00-\u9fff]')
+
+# 请求体中用户消息内容之后的固定结尾
+_REQUEST_BODY_SUFFIX = b'}]}}'
+
+# SSE事件的data行前缀及流结束标记
+_DATA_PREFIX = b"data: "
+_DONE = b"[DONE]"
+
+
+@lru_cache(maxsize=64)
+def _encode_request_prefix(system_prompt: str, model: str, temperature: float,
+                           top_p: float, max_tokens: int) -> bytes:
+    """
+    预编码请求体中用户消息内容之前的部分
+    
+    系统提示词和模型参数在同一模板下固定不变，编码结果按参数缓存，
+    每次请求只需再序列化用户提示词。
+    """
+    messages = []
+    if system_prompt:
+        messages.append({
+            "role": "system",
+            "content": system_prompt
+        })
+    
+    params = {
+        "model": model,
+        "parameters": {
+            "temperature": temperature,
+            "top_p": top_p,
+            "max_tokens": max_tokens
+        },
+        "input": {
+            "messages": messages
+        }
+    }
+    
+    # 去掉结尾的"]}}"，接上用户消息的开头
+    head = _json_dumps(params)[:-3]
+    if messages:
+        head += b','
+    return head + b'{"role":"user","content":'
+
+
+def _split_sse_data(buffer: bytearray) -> Tuple[List[bytes], bool]:
+    """
+    从缓冲区切出所有完整的行，返回其中SSE事件的data字段及是否读到[DONE]
+    
+    同步和异步流式读取共用，未以换行结尾的部分留在缓冲区等待下一块数据。
+    """
+    payloads = []
+    
+    while (index := buffer.find(b'\n')) != -1:
+        line = bytes(buffer[:index])
+        del buffer[:index + 1]
+        
+        if not line.startswith(_DATA_PREFIX):
+            continue
+        
+        data_bytes = line[len(_DATA_PREFIX):].strip()
+        if data_bytes == _DONE:
+            return payloads, True
+        payloads.append(data_bytes)
+    
+    return payloads, False
+
 
 @dataclass
 class BailianConfig:
@@ -20,14 +111,30 @@ class BailianConfig:
     timeout: int = 60
     temperature: float = 0.7
     max_tokens: int = 2000
+    cache_size: int = 256  # 响应缓存条数，0表示不缓存
+
+
+class APIResponse(NamedTuple):
+    """已读取完毕的API响应"""
+    status_code: int
+    headers: http.client.HTTPMessage
+    content: bytes
+    
+    @property
+    def text(self) -> str:
+        return self.content.decode('utf-8', errors='replace')
 
 
 class BailianClient:
     """阿里云百炼大模型客户端"""
     
+    # 需要重试的HTTP状态码
+    RETRY_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+    # 单次重试的最长等待秒数
+    MAX_RETRY_DELAY = 30
+    
     def __init__(self, config: BailianConfig):
         self.config = config
-        self.session = self._create_session()
         
         # API端点设置
         if config.endpoint:
@@ -37,31 +144,32 @@ class BailianClient:
         
         # 验证配置
         self._validate_config()
-    
-    def _create_session(self) -> requests.Session:
-        """创建带重试策略的HTTP会话"""
-        session = requests.Session()
-        
-        # 设置重试策略
-        retry_strategy = Retry(
-            total=self.config.max_retries,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["POST"],
-            backoff_factor=1
-        )
         
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
+        # 端点URL只解析一次，请求时直接复用host和路径前缀
+        parsed = urlparse(self.base_url)
+        self._scheme = parsed.scheme
+        self._host = parsed.netloc
+        self._path_prefix = parsed.path
         
-        # 设置请求头
-        session.headers.update({
+        self._headers = {
             'Authorization': f'Bearer {self.config.api_key}',
             'Content-Type': 'application/json',
             'Accept': 'application/json'
-        })
+        }
         
-        return session
+        self._init_transport()
+        
+        # 默认生成参数 (temperature, top_p, max_tokens)，未覆盖时直接复用
+        self._default_generation_params = (config.temperature, 0.8, config.max_tokens)
+        
+        # 相同提示词和参数的成功响应缓存（LRU）
+        self._response_cache: "OrderedDict[bytes, Tuple[str, Dict[str, Any]]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+    
+    def _init_transport(self):
+        """初始化底层连接"""
+        # 空闲的keep-alive连接，list的append/pop是原子操作，可在多线程间共享
+        self._idle_connections: List[http.client.HTTPConnection] = []
     
     def _validate_config(self):
         """验证配置有效性"""
@@ -72,50 +180,35 @@ class BailianClient:
             raise ValueError("模型名称不能为空")
     
     def generate_text(self, system_prompt: str, user_prompt: str, 
-                     **kwargs) -> Tuple[bool, str, Dict[str, Any]]:
+                     use_cache: bool = True, **kwargs) -> Tuple[bool, str, Dict[str, Any]]:
         """
         生成文本内容
         
         Args:
             system_prompt: 系统提示词
             user_prompt: 用户提示词
+            use_cache: 是否使用响应缓存
             **kwargs: 其他参数覆盖
             
         Returns:
             Tuple[bool, str, Dict[str, Any]]: (是否成功, 生成的文本, 响应元数据)
         """
         try:
-            # 构建请求参数
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
+            generation_params = self._generation_params(kwargs)
+            # 只在启用缓存时才对提示词计算缓存键
+            cache_key = None
+            if use_cache and self.config.cache_size > 0:
+                cache_key = self._cache_key(system_prompt, user_prompt, generation_params)
+                cached = self._get_cached_response(cache_key)
+                if cached:
+                    return cached
             
-            messages.append({
-                "role": "user", 
-                "content": user_prompt
-            })
-            
-            # 合并参数
-            params = {
-                "model": self.config.model,
-                "input": {
-                    "messages": messages
-                },
-                "parameters": {
-                    "temperature": kwargs.get("temperature", self.config.temperature),
-                    "top_p": kwargs.get("top_p", 0.8),
-                    "max_tokens": kwargs.get("max_tokens", self.config.max_tokens)
-                }
-            }
+            body = self._encode_body(system_prompt, user_prompt, generation_params)
             
-            logger.info(f"发送请求到百炼API，模型: {self.config.model}")
+            logger.info("发送请求到百炼API，模型: %s", self.config.model)
             
             # 发起请求
-            response = self._make_request("/services/aigc/text-generation/generation", params)
+            response = self._make_request("/services/aigc/text-generation/generation", body)
             
             if not response:
                 return False, "API请求失败", {}
@@ -124,9 +217,11 @@ class BailianClient:
             success, text, metadata = self._parse_response(response)
             
             if success:
-                logger.info(f"文本生成成功，长度: {len(text)}")
+                logger.info("文本生成成功，长度: %s", len(text))
+                if cache_key is not None:
+                    self._cache_response(cache_key, text, metadata)
             else:
-                logger.error(f"文本生成失败: {text}")
+                logger.error("文本生成失败: %s", text)
             
             return success, text, metadata
             
@@ -135,6 +230,34 @@ class BailianClient:
             logger.error(error_msg)
             return False, error_msg, {}
     
+    def generate_batch(self, prompts: List[Tuple[str, str]], max_workers: int = 8,
+                       **kwargs) -> List[Tuple[bool, str, Dict[str, Any]]]:
+        """
+        批量生成文本内容
+        
+        文本生成接口每次只接受一组对话，这里在线程池中并发发送，各请求复用
+        连接池中的keep-alive连接；批次内重复的提示词只请求一次。
+        
+        Args:
+            prompts: (系统提示词, 用户提示词) 列表
+            max_workers: 最大并发请求数
+            **kwargs: 其他参数覆盖
+            
+        Returns:
+            List[Tuple[bool, str, Dict[str, Any]]]: 与prompts顺序一致的生成结果
+        """
+        prompts = [tuple(prompt) for prompt in prompts]
+        unique_prompts = list(dict.fromkeys(prompts))
+        
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(unique_prompts)))) as executor:
+            outputs = executor.map(
+                lambda prompt: self.generate_text(prompt[0], prompt[1], **kwargs),
+                unique_prompts
+            )
+            results = dict(zip(unique_prompts, outputs))
+        
+        return [results[prompt] for prompt in prompts]
+    
     def generate_text_stream(self, system_prompt: str, user_prompt: str,
                            callback=None, **kwargs):
         """
@@ -147,53 +270,24 @@ class BailianClient:
             **kwargs: 其他参数
         """
         try:
-            messages = []
-            
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-            
-            messages.append({
-                "role": "user",
-                "content": user_prompt
-            })
+            params = self._build_stream_params(system_prompt, user_prompt, **kwargs)
             
-            params = {
-                "model": self.config.model,
-                "messages": messages,
-                "temperature": kwargs.get("temperature", self.config.temperature),
-                "max_tokens": kwargs.get("max_tokens", self.config.max_tokens),
-                "top_p": kwargs.get("top_p", 0.8),
-                "stream": True,
-                "incremental_output": True
-            }
-            
-            logger.info(f"开始流式生成，模型: {self.config.model}")
+            logger.info("开始流式生成，模型: %s", self.config.model)
             
             # 流式请求
-            response = self.session.post(
-                f"{self.base_url}/services/aigc/text-generation/generation",
-                json=params,
-                timeout=self.config.timeout,
-                stream=True
-            )
-            
-            response.raise_for_status()
+            body = _json_dumps(params)
+            conn, response = self._send_request("/services/aigc/text-generation/generation", body)
             
             full_text = ""
             
-            # 处理流式响应
-            for line in response.iter_lines(decode_unicode=True):
-                if line.startswith("data: "):
-                    data_str = line[6:]  # 移除"data: "前缀
-                    
-                    if data_str.strip() == "[DONE]":
-                        break
-                    
+            try:
+                if response.status >= 400:
+                    raise http.client.HTTPException(f"HTTP错误 {response.status}")
+                
+                # 处理流式响应
+                for data_bytes in self._iter_sse_data(response):
                     try:
-                        data = json.loads(data_str)
+                        data = _json_loads(data_bytes)
                         
                         if "output" in data and "text" in data["output"]:
                             chunk_text = data["output"]["text"]
@@ -204,8 +298,15 @@ class BailianClient:
                         
                     except json.JSONDecodeError:
                         continue
+                
+                # 读完剩余数据后连接才能复用
+                response.read()
+            except Exception:
+                conn.close()
+                raise
+            self._release_connection(conn)
             
-            logger.info(f"流式生成完成，总长度: {len(full_text)}")
+            logger.info("流式生成完成，总长度: %s", len(full_text))
             return True, full_text, {"stream": True}
             
         except Exception as e:
@@ -213,35 +314,211 @@ class BailianClient:
             logger.error(error_msg)
             return False, error_msg, {}
     
-    def _make_request(self, endpoint: str, params: Dict[str, Any]) -> Optional[requests.Response]:
+    def _generation_params(self, kwargs: Dict[str, Any]) -> Tuple[float, float, int]:
+        """合并调用参数与默认配置，得到 (temperature, top_p, max_tokens)"""
+        if not kwargs:
+            return self._default_generation_params
+        
+        temperature, top_p, max_tokens = self._default_generation_params
+        return (
+            kwargs.get("temperature", temperature),
+            kwargs.get("top_p", top_p),
+            kwargs.get("max_tokens", max_tokens)
+        )
+    
+    def _cache_key(self, system_prompt: str, user_prompt: str,
+                   generation_params: Tuple[float, float, int]) -> bytes:
+        """根据模型、生成参数和提示词计算缓存键"""
+        temperature, top_p, max_tokens = generation_params
+        key = f"{self.config.model}|{temperature}|{top_p}|{max_tokens}|{system_prompt}|{user_prompt}"
+        return hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+    
+    def _get_cached_response(self, cache_key: bytes) -> Optional[Tuple[bool, str, Dict[str, Any]]]:
+        """查询响应缓存，命中时返回与generate_text相同格式的结果"""
+        with self._cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is None:
+                return None
+            self._response_cache.move_to_end(cache_key)
+        
+        text, metadata = cached
+        logger.info("命中响应缓存，长度: %s", len(text))
+        return True, text, {**metadata, "from_cache": True}
+    
+    def _cache_response(self, cache_key: bytes, text: str, metadata: Dict[str, Any]):
+        """缓存成功的响应，超出容量时淘汰最久未使用的条目"""
+        if self.config.cache_size <= 0:
+            return
+        
+        with self._cache_lock:
+            self._response_cache[cache_key] = (text, dict(metadata))
+            self._response_cache.move_to_end(cache_key)
+            while len(self._response_cache) > self.config.cache_size:
+                self._response_cache.popitem(last=False)
+    
+    def _iter_sse_data(self, response: http.client.HTTPResponse, chunk_size: int = 8192):
+        """
+        逐条读取SSE事件的data字段
+        
+        按块读取原始字节并在缓冲区中按行切分，data内容保持字节形式直接交给JSON解析，
+        读到[DONE]时停止。
+        """
+        buffer = bytearray()
+        
+        while True:
+            chunk = response.read1(chunk_size)
+            if chunk:
+                buffer += chunk
+            elif buffer:
+                # 响应结束但最后一行没有换行符
+                buffer += b'\n'
+            else:
+                return
+            
+            payloads, done = _split_sse_data(buffer)
+            yield from payloads
+            if done:
+                return
+    
+    def _build_messages(self, system_prompt: str, user_prompt: str) -> List[Dict[str, str]]:
+        """构建对话消息列表"""
+        messages = []
+        
+        if system_prompt:
+            messages.append({
+                "role": "system",
+                "content": system_prompt
+            })
+        
+        messages.append({
+            "role": "user",
+            "content": user_prompt
+        })
+        
+        return messages
+    
+    def _encode_body(self, system_prompt: str, user_prompt: str,
+                     generation_params: Tuple[float, float, int]) -> bytes:
+        """编码文本生成请求体"""
+        prefix = _encode_request_prefix(system_prompt, self.config.model, *generation_params)
+        return prefix + _json_dumps(user_prompt) + _REQUEST_BODY_SUFFIX
+    
+    def _build_stream_params(self, system_prompt: str, user_prompt: str, **kwargs) -> Dict[str, Any]:
+        """构建流式生成请求参数"""
+        temperature, top_p, max_tokens = self._generation_params(kwargs)
+        return {
+            "model": self.config.model,
+            "messages": self._build_messages(system_prompt, user_prompt),
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "top_p": top_p,
+            "stream": True,
+            "incremental_output": True
+        }
+    
+    def _acquire_connection(self) -> http.client.HTTPConnection:
+        """从连接池取出一个空闲连接，没有则新建"""
+        try:
+            return self._idle_connections.pop()
+        except IndexError:
+            if self._scheme == 'https':
+                return http.client.HTTPSConnection(self._host, timeout=self.config.timeout)
+            return http.client.HTTPConnection(self._host, timeout=self.config.timeout)
+    
+    def _release_connection(self, conn: http.client.HTTPConnection):
+        """将响应已读完的连接放回连接池"""
+        self._idle_connections.append(conn)
+    
+    def _retry_delay(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """
+        计算第attempt次重试前的等待时间
+        
+        优先使用服务端Retry-After头（秒数或HTTP日期），否则指数退避，均不超过MAX_RETRY_DELAY
+        """
+        if retry_after:
+            try:
+                delay = float(retry_after)
+            except ValueError:
+                try:
+                    delay = parsedate_to_datetime(retry_after).timestamp() - time.time()
+                except (TypeError, ValueError):
+                    delay = None
+            if delay is not None:
+                return min(self.MAX_RETRY_DELAY, max(0.0, delay))
+        
+        return min(self.MAX_RETRY_DELAY, 2 ** (attempt - 1))
+    
+    def _send_request(self, endpoint: str,
+                      body: bytes) -> Tuple[http.client.HTTPConnection, http.client.HTTPResponse]:
+        """
+        在池化连接上发送POST请求，对可重试的状态码和网络错误自动重试
+        
+        Returns:
+            Tuple[HTTPConnection, HTTPResponse]: 连接及尚未读取响应体的响应，
+            调用方读完响应后需归还或关闭连接
+        """
+        path = f"{self._path_prefix}{endpoint}"
+        attempt = 0
+        
+        while True:
+            conn = self._acquire_connection()
+            reused = conn.sock is not None
+            retry_after = None
+            
+            try:
+                conn.request("POST", path, body, self._headers)
+                response = conn.getresponse()
+            except (http.client.HTTPException, OSError) as e:
+                conn.close()
+                if reused and isinstance(e, ConnectionError):
+                    # 空闲连接已被服务端关闭，直接重连，不计入重试次数
+                    continue
+                if attempt >= self.config.max_retries:
+                    raise
+            else:
+                if (response.status not in self.RETRY_STATUS_CODES
+                        or attempt >= self.config.max_retries):
+                    return conn, response
+                retry_after = response.getheader('Retry-After')
+                response.read()
+                self._release_connection(conn)
+            
+            attempt += 1
+            delay = self._retry_delay(attempt, retry_after)
+            logger.warning("API请求失败，%.1f秒后进行第%d次重试", delay, attempt)
+            time.sleep(delay)
+    
+    def _make_request(self, endpoint: str, body: bytes) -> Optional[APIResponse]:
         """发起API请求"""
         try:
-            url = f"{self.base_url}{endpoint}"
+            conn, raw_response = self._send_request(endpoint, body)
             
-            response = self.session.post(
-                url,
-                json=params,
-                timeout=self.config.timeout
-            )
+            try:
+                response = APIResponse(raw_response.status, raw_response.headers, raw_response.read())
+            except Exception:
+                conn.close()
+                raise
+            self._release_connection(conn)
+            
+            if response.status_code >= 400:
+                logger.error("API请求失败，响应状态码: %s", response.status_code)
+                logger.error("响应内容: %s", response.text)
+                return None
             
-            response.raise_for_status()
             return response
             
-        except requests.exceptions.RequestException as e:
-            logger.error(f"API请求失败: {str(e)}")
-            if hasattr(e, 'response') and e.response:
-                logger.error(f"响应状态码: {e.response.status_code}")
-                logger.error(f"响应内容: {e.response.text}")
+        except (http.client.HTTPException, OSError) as e:
+            logger.error("API请求失败: %s", e)
             return None
         
         except Exception as e:
-            logger.error(f"请求异常: {str(e)}")
+            logger.error("请求异常: %s", e)
             return None
     
-    def _parse_response(self, response: requests.Response) -> Tuple[bool, str, Dict[str, Any]]:
+    def _parse_response(self, response: APIResponse) -> Tuple[bool, str, Dict[str, Any]]:
         """解析API响应"""
         try:
-            data = response.json()
+            data = _json_loads(response.content)
             
             # 提取响应元数据
             metadata = {
@@ -251,34 +528,30 @@ class BailianClient:
             }
             
             # 检查是否有输出
-            if "output" not in data:
+            output = data.get("output")
+            if output is None:
                 return False, "响应中无output字段", metadata
             
-            output = data["output"]
-            
             # 提取生成的文本
-            if "text" in output:
-                text = output["text"].strip()
-                
-                # 添加使用信息到元数据
-                if "usage" in data:
-                    usage = data["usage"]
-                    metadata.update({
-                        "input_tokens": usage.get("input_tokens", 0),
-                        "output_tokens": usage.get("output_tokens", 0),
-                        "total_tokens": usage.get("total_tokens", 0)
-                    })
-                
-                return True, text, metadata
-            else:
+            text = output.get("text")
+            if text is None:
                 return False, "响应输出中无文本内容", metadata
+            
+            # 添加使用信息到元数据
+            usage = data.get("usage")
+            if usage:
+                metadata["input_tokens"] = usage.get("input_tokens", 0)
+                metadata["output_tokens"] = usage.get("output_tokens", 0)
+                metadata["total_tokens"] = usage.get("total_tokens", 0)
+            
+            return True, text.strip(), metadata
                 
         except json.JSONDecodeError as e:
-            logger.error(f"JSON解析失败: {str(e)}")
+            logger.error("JSON解析失败: %s", e)
             return False, f"响应解析失败: {str(e)}", {"status_code": response.status_code}
         
         except Exception as e:
-            logger.error(f"响应处理异常: {str(e)}")
+            logger.error("响应处理异常: %s", e)
             return False, f"响应处理异常: {str(e)}", {"status_code": response.status_code}
     
     def test_connection(self) -> Tuple[bool, str]:
@@ -287,6 +560,7 @@ class BailianClient:
             success, text, metadata = self.generate_text(
                 system_prompt="你是一个测试助手。",
                 user_prompt="请回复：连接成功",
+                use_cache=False,
                 max_tokens=50
             )
             
@@ -314,16 +588,16 @@ class BailianClient:
     def estimate_tokens(self, text: str) -> int:
         """估算文本token数量（简单估算）"""
         # 简单估算：中文按字符数，英文按单词数*1.3
-        chinese_chars = len([c for c in text if '\u4e00' <= c <= '\u9fff'])
-        other_chars = len(text) - chinese_chars
+        # subn在C层完成匹配计数，不逐字符执行Python代码
+        chinese_chars = _CJK_PATTERN.subn('', text)[1]
         english_words = len(text.split())
         
         return int(chinese_chars + english_words * 1.3)
     
     def close(self):
         """关闭客户端"""
-        if self.session:
-            self.session.close()
+        while self._idle_connections:
+            self._idle_connections.pop().close()
     
     def __enter__(self):
         return self
@@ -332,6 +606,245 @@ class BailianClient:
         self.close()
 
 
+class AsyncBailianClient(BailianClient):
+    """
+    阿里云百炼大模型异步客户端
+    
+    基于httpx.AsyncClient实现，启用HTTP/2时多个并发请求复用同一条TLS连接，
+    适合配合asyncio.gather批量调用。
+    """
+    
+    def __init__(self, config: BailianConfig, max_connections: int = 20):
+        if httpx is None:
+            raise ImportError("AsyncBailianClient需要安装httpx: pip install 'httpx[http2]'")
+        self.max_connections = max_connections
+        super().__init__(config)
+    
+    def _init_transport(self):
+        """初始化底层连接，异步客户端只使用httpx连接池"""
+        self.session = self._create_session()
+    
+    def _create_session(self) -> "httpx.AsyncClient":
+        """创建带连接池的异步HTTP客户端"""
+        return httpx.AsyncClient(
+            # 未安装h2时退回HTTP/1.1
+            http2=importlib.util.find_spec("h2") is not None,
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=20
+            ),
+            timeout=self.config.timeout,
+            headers=self._headers
+        )
+    
+    async def generate_text(self, system_prompt: str, user_prompt: str,
+                            use_cache: bool = True, **kwargs) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        异步生成文本内容
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            use_cache: 是否使用响应缓存
+            **kwargs: 其他参数覆盖
+            
+        Returns:
+            Tuple[bool, str, Dict[str, Any]]: (是否成功, 生成的文本, 响应元数据)
+        """
+        try:
+            generation_params = self._generation_params(kwargs)
+            # 只在启用缓存时才对提示词计算缓存键
+            cache_key = None
+            if use_cache and self.config.cache_size > 0:
+                cache_key = self._cache_key(system_prompt, user_prompt, generation_params)
+                cached = self._get_cached_response(cache_key)
+                if cached:
+                    return cached
+            
+            body = self._encode_body(system_prompt, user_prompt, generation_params)
+            
+            logger.info("发送异步请求到百炼API，模型: %s", self.config.model)
+            
+            response = await self._make_request("/services/aigc/text-generation/generation", body)
+            
+            if not response:
+                return False, "API请求失败", {}
+            
+            success, text, metadata = self._parse_response(response)
+            
+            if success:
+                logger.info("文本生成成功，长度: %s", len(text))
+                if cache_key is not None:
+                    self._cache_response(cache_key, text, metadata)
+            else:
+                logger.error("文本生成失败: %s", text)
+            
+            return success, text, metadata
+            
+        except Exception as e:
+            error_msg = f"文本生成异常: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg, {}
+    
+    async def generate_batch(self, prompts: List[Tuple[str, str]],
+                             **kwargs) -> List[Tuple[bool, str, Dict[str, Any]]]:
+        """
+        异步批量生成文本内容，并发数受连接池上限约束
+        
+        Args:
+            prompts: (系统提示词, 用户提示词) 列表
+            **kwargs: 其他参数覆盖
+            
+        Returns:
+            List[Tuple[bool, str, Dict[str, Any]]]: 与prompts顺序一致的生成结果
+        """
+        prompts = [tuple(prompt) for prompt in prompts]
+        unique_prompts = list(dict.fromkeys(prompts))
+        
+        outputs = await asyncio.gather(*[
+            self.generate_text(system_prompt, user_prompt, **kwargs)
+            for system_prompt, user_prompt in unique_prompts
+        ])
+        results = dict(zip(unique_prompts, outputs))
+        
+        return [results[prompt] for prompt in prompts]
+    
+    async def generate_text_stream(self, system_prompt: str, user_prompt: str,
+                                   callback=None, **kwargs):
+        """
+        异步流式生成文本内容
+        
+        Args:
+            system_prompt: 系统提示词
+            user_prompt: 用户提示词
+            callback: 回调函数，接收生成的文本片段
+            **kwargs: 其他参数
+        """
+        try:
+            params = self._build_stream_params(system_prompt, user_prompt, **kwargs)
+            
+            logger.info("开始异步流式生成，模型: %s", self.config.model)
+            
+            full_text = ""
+            
+            async with self.session.stream(
+                "POST",
+                f"{self.base_url}/services/aigc/text-generation/generation",
+                content=_json_dumps(params)
+            ) as response:
+                response.raise_for_status()
+                
+                async for data_bytes in self._aiter_sse_data(response):
+                    try:
+                        data = _json_loads(data_bytes)
+                        
+                        if "output" in data and "text" in data["output"]:
+                            chunk_text = data["output"]["text"]
+                            full_text = chunk_text  # 百炼API返回的是累积文本
+                            
+                            if callback:
+                                callback(chunk_text)
+                        
+                    except json.JSONDecodeError:
+                        continue
+            
+            logger.info("流式生成完成，总长度: %s", len(full_text))
+            return True, full_text, {"stream": True}
+            
+        except Exception as e:
+            error_msg = f"流式生成异常: {str(e)}"
+            logger.error(error_msg)
+            return False, error_msg, {}
+    
+    async def _aiter_sse_data(self, response: "httpx.Response"):
+        """逐条读取SSE事件的data字段，与_iter_sse_data共用按行切分的逻辑"""
+        buffer = bytearray()
+        
+        async for chunk in response.aiter_bytes():
+            buffer += chunk
+            
+            payloads, done = _split_sse_data(buffer)
+            for data_bytes in payloads:
+                yield data_bytes
+            if done:
+                return
+        
+        # 响应结束但最后一行没有换行符
+        if buffer:
+            buffer += b'\n'
+            for data_bytes in _split_sse_data(buffer)[0]:
+                yield data_bytes
+    
+    async def _make_request(self, endpoint: str, body: bytes) -> Optional["httpx.Response"]:
+        """发起异步API请求，对可重试的状态码和网络错误自动重试"""
+        try:
+            attempt = 0
+            while True:
+                retry_after = None
+                try:
+                    response = await self.session.post(f"{self.base_url}{endpoint}", content=body)
+                except httpx.TransportError:
+                    if attempt >= self.config.max_retries:
+                        raise
+                else:
+                    if (response.status_code not in self.RETRY_STATUS_CODES
+                            or attempt >= self.config.max_retries):
+                        break
+                    retry_after = response.headers.get('Retry-After')
+                
+                attempt += 1
+                delay = self._retry_delay(attempt, retry_after)
+                logger.warning("API请求失败，%.1f秒后进行第%d次重试", delay, attempt)
+                await asyncio.sleep(delay)
+            
+            response.raise_for_status()
+            return response
+            
+        except httpx.HTTPStatusError as e:
+            logger.error("API请求失败: %s", e)
+            logger.error("响应状态码: %s", e.response.status_code)
+            logger.error("响应内容: %s", e.response.text)
+            return None
+        
+        except Exception as e:
+            logger.error("请求异常: %s", e)
+            return None
+    
+    async def test_connection(self) -> Tuple[bool, str]:
+        """测试API连接"""
+        try:
+            success, text, metadata = await self.generate_text(
+                system_prompt="你是一个测试助手。",
+                user_prompt="请回复：连接成功",
+                use_cache=False,
+                max_tokens=50
+            )
+            
+            if success and "连接成功" in text:
+                return True, "API连接正常"
+            elif success:
+                return True, f"API连接正常，响应: {text[:100]}"
+            else:
+                return False, f"API连接失败: {text}"
+                
+        except Exception as e:
+            return False, f"连接测试异常: {str(e)}"
+    
+    async def close(self):
+        """关闭客户端"""
+        if self.session:
+            await self.session.aclose()
+    
+    def __enter__(self):
+        raise TypeError("AsyncBailianClient需要使用 async with")
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+
 # 便捷函数
 def create_bailian_client(api_key: str, model: str = "qwen-max", 
                          endpoint: Optional[str] = None, **kwargs) -> BailianClient:
@@ -373,4 +886,28 @@ def generate_content(api_key: str, system_prompt: str, user_prompt: str,
         Tuple[bool, str, Dict[str, Any]]: (是否成功, 生成内容, 元数据)
     """
     with create_bailian_client(api_key, model) as client:
-        return client.generate_text(system_prompt, user_prompt, **kwargs)
\ No newline at end of file
+        return client.generate_text(system_prompt, user_prompt, **kwargs)
+
+
+def generate_contents(api_key: str, prompts: List[Tuple[str, str]],
+                      model: str = "qwen-max", max_connections: int = 20,
+                      **kwargs) -> List[Tuple[bool, str, Dict[str, Any]]]:
+    """
+    并发生成多条内容的便捷函数（同步调用入口）
+    
+    Args:
+        api_key: API密钥
+        prompts: (系统提示词, 用户提示词) 列表
+        model: 模型名称
+        max_connections: 最大并发连接数
+        **kwargs: 其他参数
+        
+    Returns:
+        List[Tuple[bool, str, Dict[str, Any]]]: 与prompts顺序一致的生成结果
+    """
+    async def _run():
+        config = BailianConfig(api_key=api_key, model=model)
+        async with AsyncBailianClient(config, max_connections=max_connections) as client:
+            return await client.generate_batch(prompts, **kwargs)
+    
+    return asyncio.run(_run())
@@ -1,50 +1,128 @@
-import requests
+import os
+import re
+import codecs
+import json
 import time
+import hashlib
+import requests
 import logging
-from typing import Dict, Optional, Tuple
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
 from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+try:
+    import charset_normalizer
+except ImportError:  # requests的可选依赖，未安装时默认按UTF-8解码
+    charset_normalizer = None
+
 logger = logging.getLogger(__name__)
 
+# Cache-Control中的max-age指令
+_MAX_AGE_PATTERN = re.compile(r'max-age\s*=\s*(\d+)', re.I)
+
+# 可以作为网页文本处理的内容类型，其他类型（图片、PDF等）不读取响应体
+_SUPPORTED_CONTENT_TYPES = frozenset({'text/html', 'application/xhtml+xml', 'text/plain'})
+
+# Content-Type头中的charset参数
+_HEADER_CHARSET = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# 网页开头的<meta charset>或<meta http-equiv>中声明的编码
+_META_CHARSET = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.I)
+
+# 编码检测只看开头的字节数
+_DETECT_PREFIX_SIZE = 4096
+
+
+def _create_session(max_retries: int, pool_maxsize: int) -> requests.Session:
+    """创建带有重试策略的Session"""
+    session = requests.Session()
+    
+    # 设置重试策略：遵循服务端的Retry-After，退避时间加随机抖动避免并发请求同时重试；
+    # 重试用尽后返回最后一次响应，由raise_for_status给出具体的状态码
+    retry_strategy = Retry(
+        total=max_retries,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=["HEAD", "GET", "OPTIONS"],
+        backoff_factor=0.5,
+        backoff_jitter=0.5,
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    
+    # 连接池过小时并发请求会丢弃多余连接，之后每次都要重新建立TCP/TLS连接
+    adapter = HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=pool_maxsize,
+        pool_block=False,
+        max_retries=retry_strategy
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    
+    # 设置默认headers以模拟真实浏览器
+    session.headers.update({
+        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
+        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+        'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+        'Accept-Encoding': 'gzip, deflate, br',
+        'DNT': '1',
+        'Connection': 'keep-alive',
+        'Upgrade-Insecure-Requests': '1'
+    })
+    
+    return session
+
+
+# 进程内共享的Session，按(重试次数, 连接池大小)区分；多个爬虫实例复用keep-alive连接和TLS会话
+_SHARED_SESSIONS: Dict[Tuple[int, int], requests.Session] = {}
+_SHARED_SESSIONS_LOCK = threading.Lock()
+
+
+def _get_shared_session(max_retries: int = 3, pool_maxsize: int = 20) -> requests.Session:
+    """获取共享的Session，首次使用时创建"""
+    key = (max_retries, pool_maxsize)
+    session = _SHARED_SESSIONS.get(key)
+    if session is None:
+        with _SHARED_SESSIONS_LOCK:
+            session = _SHARED_SESSIONS.get(key)
+            if session is None:
+                session = _SHARED_SESSIONS[key] = _create_session(max_retries, pool_maxsize)
+    return session
+
 
 class WebCrawler:
     """网页内容爬取器，支持反爬虫策略和错误重试"""
     
-    def __init__(self, timeout: int = 30, max_retries: int = 3):
+    def __init__(self, timeout: int = 30, max_retries: int = 3, pool_maxsize: int = 20,
+                 cache_dir: Optional[str] = None, max_bytes: int = 5_000_000, shared: bool = True):
+        """
+        初始化爬虫
+        
+        Args:
+            timeout: 请求超时时间（秒）
+            max_retries: 最大重试次数
+            pool_maxsize: 每个站点保留的keep-alive连接数，多线程/并发爬取时应不小于并发数
+            cache_dir: 网页缓存目录，设置后按ETag/Last-Modified做条件请求，None表示不缓存
+            max_bytes: 单个网页最多读取的字节数，超出部分丢弃
+            shared: 是否使用进程内共享的Session（连接池和Cookie在所有共享实例间复用），
+                False时创建独立的Session，由close()关闭
+        """
         self.timeout = timeout
+        self.max_bytes = max_bytes
         self.max_retries = max_retries
-        self.session = self._create_session()
-    
-    def _create_session(self) -> requests.Session:
-        """创建带有重试策略的Session"""
-        session = requests.Session()
-        
-        # 设置重试策略
-        retry_strategy = Retry(
-            total=self.max_retries,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["HEAD", "GET", "OPTIONS"],
-            backoff_factor=1
-        )
-        
-        adapter = HTTPAdapter(max_retries=retry_strategy)
-        session.mount("http://", adapter)
-        session.mount("https://", adapter)
-        
-        # 设置默认headers以模拟真实浏览器
-        session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'DNT': '1',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1'
-        })
-        
-        return session
+        self.pool_maxsize = pool_maxsize
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.shared = shared
+        if shared:
+            self.session = _get_shared_session(max_retries, pool_maxsize)
+        else:
+            self.session = _create_session(max_retries, pool_maxsize)
     
     def crawl_url(self, url: str, headers: Optional[Dict[str, str]] = None) -> Tuple[bool, str, Dict[str, str]]:
         """
@@ -62,39 +140,84 @@ class WebCrawler:
             if not self._validate_url(url):
                 return False, f"Invalid URL format: {url}", {}
             
+            # 缓存未过期时直接返回，不发起请求
+            cached = self._load_cache(url)
+            if cached and cached['expires'] > time.time():
+                logger.info(f"使用缓存内容: {url}")
+                return True, cached['content'], {**cached['metadata'], 'from_cache': True}
+            
             logger.info(f"开始爬取URL: {url}")
             
-            # 合并自定义headers
-            request_headers = self.session.headers.copy()
-            if headers:
-                request_headers.update(headers)
+            # 只传入额外的headers，Session会自动与默认headers合并；没有额外headers时不做拷贝
+            request_headers = dict(headers) if headers else None
+            
+            # 有缓存时发送条件请求，内容未变化时服务端只返回304
+            if cached:
+                request_headers = request_headers or {}
+                if cached.get('etag'):
+                    request_headers['If-None-Match'] = cached['etag']
+                if cached.get('last_modified'):
+                    request_headers['If-Modified-Since'] = cached['last_modified']
             
-            # 发起请求
+            # 发起请求，响应体按块读取
             response = self.session.get(
                 url,
                 headers=request_headers,
                 timeout=self.timeout,
-                allow_redirects=True
+                allow_redirects=True,
+                stream=True
             )
             
-            # 检查响应状态
-            response.raise_for_status()
+            with response:
+                if response.status_code == 304 and cached:
+                    logger.info(f"内容未修改，使用缓存: {url}")
+                    self._save_cache(url, response, cached['content'], cached['metadata'], previous=cached)
+                    return True, cached['content'], {**cached['metadata'], 'from_cache': True}
+                
+                # 检查响应状态
+                response.raise_for_status()
+                
+                # 在读取响应体前过滤非网页内容，未声明类型的按网页处理
+                content_type = response.headers.get('content-type', '')
+                mime_type = content_type.split(';', 1)[0].strip().lower()
+                if mime_type and mime_type not in _SUPPORTED_CONTENT_TYPES:
+                    error_msg = f"不支持的内容类型 {mime_type}: {url}"
+                    logger.error(error_msg)
+                    return False, error_msg, {
+                        'status_code': response.status_code,
+                        'content_type': content_type,
+                        'final_url': response.url
+                    }
+                
+                content, truncated = self._read_body(response)
             
-            # 尝试获取正确的编码
-            response.encoding = response.apparent_encoding or 'utf-8'
+            if truncated:
+                logger.warning(f"网页内容超过{self.max_bytes}字节，已截断: {url}")
+            
+            # 确定编码后只解码一次
+            encoding = self._detect_encoding(content_type, content)
+            try:
+                text = content.decode(encoding, errors='replace')
+            except LookupError:
+                # 网页声明了无法识别的编码
+                encoding = 'utf-8'
+                text = content.decode(encoding, errors='replace')
             
             # 提取响应元数据
             metadata = {
                 'status_code': response.status_code,
-                'content_type': response.headers.get('content-type', ''),
-                'content_length': len(response.text),
+                'content_type': content_type,
+                'content_length': len(content),
                 'final_url': response.url,
-                'encoding': response.encoding
+                'encoding': encoding,
+                'truncated': truncated
             }
             
             logger.info(f"成功爬取URL: {url}, 内容长度: {metadata['content_length']}")
             
-            return True, response.text, metadata
+            self._save_cache(url, response, text, metadata)
+            
+            return True, text, metadata
             
         except requests.exceptions.Timeout:
             error_msg = f"请求超时: {url}"
@@ -121,6 +244,115 @@ class WebCrawler:
             logger.error(error_msg)
             return False, error_msg, {}
     
+    def _read_body(self, response: requests.Response) -> Tuple[bytes, bool]:
+        """
+        按块读取响应体，超过max_bytes时停止读取
+        
+        Returns:
+            Tuple[bytes, bool]: (响应体, 是否被截断)
+        """
+        buffer = bytearray()
+        
+        for chunk in response.iter_content(chunk_size=65536):
+            buffer += chunk
+            if len(buffer) >= self.max_bytes:
+                del buffer[self.max_bytes:]
+                return bytes(buffer), True
+        
+        return bytes(buffer), False
+    
+    def _detect_encoding(self, content_type: str, content: bytes) -> str:
+        """
+        确定响应内容的编码
+        
+        依次使用Content-Type头、网页开头声明的charset，都没有时才对开头的字节做编码检测，
+        避免对整个响应体运行检测。
+        """
+        match = _HEADER_CHARSET.search(content_type)
+        if match:
+            return match.group(1)
+        
+        prefix = content[:_DETECT_PREFIX_SIZE]
+        match = _META_CHARSET.search(prefix)
+        if match:
+            return match.group(1).decode('ascii')
+        
+        # 大多数网页是UTF-8，先做一次快速校验，末尾被截断的多字节字符不算错误
+        try:
+            codecs.getincrementaldecoder('utf-8')().decode(prefix, final=False)
+            return 'utf-8'
+        except UnicodeDecodeError:
+            pass
+        
+        if charset_normalizer is not None:
+            best = charset_normalizer.from_bytes(prefix).best()
+            if best is not None:
+                return best.encoding
+        
+        return 'utf-8'
+    
+    def _cache_path(self, url: str) -> Path:
+        """URL对应的缓存文件路径"""
+        return self.cache_dir / f"{hashlib.blake2b(url.encode('utf-8'), digest_size=16).hexdigest()}.json"
+    
+    def _load_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """读取URL的缓存条目，未启用缓存或没有缓存时返回None"""
+        if not self.cache_dir:
+            return None
+        
+        try:
+            with open(self._cache_path(url), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取缓存失败 {url}: {str(e)}")
+            return None
+    
+    def _save_cache(self, url: str, response: requests.Response, content: str,
+                    metadata: Dict[str, Any], previous: Optional[Dict[str, Any]] = None):
+        """
+        按响应的缓存头保存内容，no-store或没有校验信息和有效期的响应不缓存
+        
+        previous为304响应对应的旧缓存条目，响应中未重复给出的ETag/Last-Modified沿用旧值
+        """
+        if not self.cache_dir:
+            return
+        
+        cache_control = response.headers.get('cache-control', '').lower()
+        if 'no-store' in cache_control:
+            return
+        
+        max_age = 0
+        if 'no-cache' not in cache_control:
+            match = _MAX_AGE_PATTERN.search(cache_control)
+            if match:
+                max_age = int(match.group(1))
+        
+        previous = previous or {}
+        etag = response.headers.get('etag') or previous.get('etag')
+        last_modified = response.headers.get('last-modified') or previous.get('last_modified')
+        if not (etag or last_modified or max_age):
+            return
+        
+        entry = {
+            'etag': etag,
+            'last_modified': last_modified,
+            'expires': time.time() + max_age,
+            'content': content,
+            'metadata': metadata
+        }
+        
+        # 先写临时文件再替换，并发爬取时不会读到写了一半的缓存
+        cache_path = self._cache_path(url)
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.{id(entry)}.tmp")
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            logger.warning(f"保存缓存失败 {url}: {str(e)}")
+    
     def _validate_url(self, url: str) -> bool:
         """验证URL格式是否正确"""
         try:
@@ -129,31 +361,51 @@ class WebCrawler:
         except Exception:
             return False
     
-    def crawl_multiple_urls(self, urls: list, delay: float = 1.0) -> Dict[str, Tuple[bool, str, Dict[str, str]]]:
+    def crawl_multiple_urls(self, urls: list, delay: float = 1.0,
+                            concurrency: int = 10) -> Dict[str, Tuple[bool, str, Dict[str, str]]]:
         """
         批量爬取多个URL
         
+        同步接口，在线程池中并发调用crawl_url，各线程共享Session的连接池，
+        也可以在运行中的事件循环里调用。不同站点并发爬取，同一站点的请求之间保持delay的间隔。
+        
         Args:
             urls: URL列表
-            delay: 请求间隔时间（秒）
+            delay: 同一站点的请求间隔时间（秒）
+            concurrency: 最大并发请求数，不应超过pool_maxsize
             
         Returns:
-            Dict[str, Tuple[bool, str, Dict[str, str]]]: URL -> (是否成功, 内容或错误信息, 元数据)
+            Dict[str, Tuple[bool, str, Dict[str, str]]]: URL -> (是否成功, 内容或错误信息, 元数据)，顺序与输入一致
         """
-        results = {}
+        # 预先排好每个URL的发起时间：同一站点依次间隔delay，不同站点互不影响
+        unique_urls = list(dict.fromkeys(urls))
+        next_slot: Dict[str, float] = {}
+        schedule = []
+        for url in unique_urls:
+            host = urlparse(url).netloc
+            slot = next_slot.get(host, 0.0)
+            next_slot[host] = slot + delay
+            schedule.append((slot, url))
         
-        for i, url in enumerate(urls):
-            results[url] = self.crawl_url(url)
-            
-            # 添加延时避免被反爬虫
-            if i < len(urls) - 1:
-                time.sleep(delay)
+        # 按发起时间提交，等待中的线程总在最早到期的请求上，一个站点的积压不会挡住其他站点
+        schedule.sort(key=lambda item: item[0])
+        start = time.monotonic()
         
-        return results
+        def fetch(item: Tuple[float, str]) -> Tuple[bool, str, Dict[str, str]]:
+            slot, url = item
+            wait = start + slot - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            return self.crawl_url(url)
+        
+        with ThreadPoolExecutor(max_workers=max(1, concurrency)) as executor:
+            results = dict(zip((url for _, url in schedule), executor.map(fetch, schedule)))
+        
+        return {url: results[url] for url in urls}
     
     def close(self):
-        """关闭Session"""
-        if self.session:
+        """关闭Session，共享的Session保持打开供其他实例使用"""
+        if self.session and not self.shared:
             self.session.close()
     
     def __enter__(self):
@@ -168,6 +420,8 @@ def crawl_single_url(url: str, timeout: int = 30, headers: Optional[Dict[str, st
     """
     爬取单个URL的便捷函数
     
+    使用共享的Session，多次调用之间保持keep-alive连接，不必每次重新建立TCP/TLS连接。
+    
     Args:
         url: 要爬取的URL
         timeout: 超时时间
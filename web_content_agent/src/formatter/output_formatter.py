@@ -4,10 +4,124 @@ import logging
 from typing import Dict, List, Optional, Any
 from datetime import datetime
 from enum import Enum
+from functools import lru_cache
 import html
 
 logger = logging.getLogger(__name__)
 
+# 预编译的Markdown处理正则
+_EXTRA_BLANK_LINES = re.compile(r'\n{3,}')
+_EMOJI_WITHOUT_SPACE = re.compile(r'([^\s])([🎉🔥💡📝🎯✨👍💪🚀🌟⭐])')
+_MD_HEADING = re.compile(r'^(#{1,3}) (.*?)$', re.MULTILINE)
+_MD_HEADING_MARK = re.compile(r'^#{1,6}\s+', re.MULTILINE)
+_MD_BOLD = re.compile(r'\*\*(.*?)\*\*')
+_MD_ITALIC = re.compile(r'\*(.*?)\*')
+_MD_LINK = re.compile(r'\[([^\]]+)\]\([^\)]+\)')
+_HTML_HEADING_START = re.compile(r'^<[hH][1-6]>')
+
+# HTML输出使用的样式表
+_HTML_STYLES = """
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
+            line-height: 1.6;
+            max-width: 800px;
+            margin: 0 auto;
+            padding: 20px;
+            background-color: #f5f5f5;
+        }
+        
+        .metadata {
+            background: #e3f2fd;
+            border-left: 4px solid #2196f3;
+            padding: 15px;
+            margin-bottom: 20px;
+            border-radius: 4px;
+        }
+        
+        .metadata h3 {
+            margin-top: 0;
+            color: #1976d2;
+        }
+        
+        .content {
+            background: white;
+            padding: 30px;
+            border-radius: 8px;
+            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
+            margin-bottom: 20px;
+        }
+        
+        .content h1, .content h2, .content h3 {
+            color: #333;
+            border-bottom: 2px solid #eee;
+            padding-bottom: 10px;
+        }
+        
+        .content p {
+            margin-bottom: 15px;
+            text-align: justify;
+        }
+        
+        .stats {
+            background: #f1f8e9;
+            border-left: 4px solid #8bc34a;
+            padding: 15px;
+            border-radius: 4px;
+        }
+        
+        .stats h3 {
+            margin-top: 0;
+            color: #689f38;
+        }
+        
+        .stat-item {
+            display: inline-block;
+            background: #dcedc8;
+            padding: 5px 10px;
+            border-radius: 15px;
+            margin-right: 10px;
+            font-size: 14px;
+        }
+        
+        a {
+            color: #1976d2;
+            text-decoration: none;
+        }
+        
+        a:hover {
+            text-decoration: underline;
+        }
+        """
+
+# HTML输出中固定不变的头部和尾部，导入时拼接一次
+_HTML_PREFIX = '\n'.join([
+    '<!DOCTYPE html>',
+    '<html lang="zh-CN">',
+    '<head>',
+    '    <meta charset="UTF-8">',
+    '    <meta name="viewport" content="width=device-width, initial-scale=1.0">',
+    '    <title>网页内容整理结果</title>',
+    '    <style>',
+    _HTML_STYLES,
+    '    </style>',
+    '</head>',
+    '<body>'
+])
+_HTML_SUFFIX = '</body>\n</html>'
+
+# 以空白分隔的词
+_WORD = re.compile(r'\S+')
+
+
+def _count_words(text: str) -> int:
+    """统计词数，与len(text.split())相同但不构造子串列表"""
+    return sum(1 for _ in _WORD.finditer(text))
+
+
+def _count_lines(text: str) -> int:
+    """统计行数，与按换行符切分后的段数相同"""
+    return text.count('\n') + 1
+
 
 class OutputFormat(Enum):
     """输出格式枚举"""
@@ -17,11 +131,23 @@ class OutputFormat(Enum):
     JSON = "json"
 
 
+# 格式名称 -> 格式枚举
+FORMAT_MAP = {fmt.value: fmt for fmt in OutputFormat}
+
+
 class OutputFormatter:
     """输出格式化器，负责将AI生成的内容格式化为不同的输出格式"""
     
     def __init__(self, default_format: OutputFormat = OutputFormat.MARKDOWN):
         self.default_format = default_format
+        
+        # 格式类型 -> 格式化方法
+        self._handlers = {
+            OutputFormat.MARKDOWN: self._format_as_markdown,
+            OutputFormat.HTML: self._format_as_html,
+            OutputFormat.TEXT: self._format_as_text,
+            OutputFormat.JSON: self._format_as_json
+        }
     
     def format_content(self, content: str, format_type: OutputFormat = None,
                       metadata: Optional[Dict[str, Any]] = None) -> str:
@@ -40,18 +166,13 @@ class OutputFormatter:
             format_type = self.default_format
         
         try:
-            if format_type == OutputFormat.MARKDOWN:
-                return self._format_as_markdown(content, metadata)
-            elif format_type == OutputFormat.HTML:
-                return self._format_as_html(content, metadata)
-            elif format_type == OutputFormat.TEXT:
-                return self._format_as_text(content, metadata)
-            elif format_type == OutputFormat.JSON:
-                return self._format_as_json(content, metadata)
-            else:
+            handler = self._handlers.get(format_type)
+            if handler is None:
                 logger.warning(f"未知的格式类型: {format_type}，使用默认格式")
-                return self._format_as_markdown(content, metadata)
-                
+                handler = self._format_as_markdown
+            
+            return handler(content, metadata)
+            
         except Exception as e:
             logger.error(f"内容格式化失败: {str(e)}")
             return content  # 返回原始内容
@@ -88,20 +209,8 @@ class OutputFormatter:
     
     def _format_as_html(self, content: str, metadata: Optional[Dict[str, Any]] = None) -> str:
         """格式化为HTML格式"""
-        html_parts = []
-        
         # HTML头部
-        html_parts.append('<!DOCTYPE html>')
-        html_parts.append('<html lang="zh-CN">')
-        html_parts.append('<head>')
-        html_parts.append('    <meta charset="UTF-8">')
-        html_parts.append('    <meta name="viewport" content="width=device-width, initial-scale=1.0">')
-        html_parts.append('    <title>网页内容整理结果</title>')
-        html_parts.append('    <style>')
-        html_parts.append(self._get_html_styles())
-        html_parts.append('    </style>')
-        html_parts.append('</head>')
-        html_parts.append('<body>')
+        html_parts = [_HTML_PREFIX]
         
         # 元数据信息
         if metadata:
@@ -132,8 +241,7 @@ class OutputFormatter:
             html_parts.append('    </div>')
         
         # HTML尾部
-        html_parts.append('</body>')
-        html_parts.append('</html>')
+        html_parts.append(_HTML_SUFFIX)
         
         return '\n'.join(html_parts)
     
@@ -194,22 +302,19 @@ class OutputFormatter:
         # 计算内容统计
         data["statistics"] = {
             "character_count": len(content),
-            "word_count": len(content.split()),
-            "line_count": len(content.split('\n'))
+            "word_count": _count_words(content),
+            "line_count": _count_lines(content)
         }
         
         return json.dumps(data, ensure_ascii=False, indent=2)
     
     def _enhance_markdown_formatting(self, content: str) -> str:
         """增强Markdown格式"""
-        # 确保标题格式正确
-        content = re.sub(r'^([^#\n].*?)$', r'\1', content, flags=re.MULTILINE)
-        
         # 添加适当的段落间距
-        content = re.sub(r'\n{3,}', '\n\n', content)
+        content = _EXTRA_BLANK_LINES.sub('\n\n', content)
         
         # 确保emoji后有空格
-        content = re.sub(r'([^\s])([🎉🔥💡📝🎯✨👍💪🚀🌟⭐])', r'\1 \2', content)
+        content = _EMOJI_WITHOUT_SPACE.sub(r'\1 \2', content)
         
         return content.strip()
     
@@ -218,16 +323,14 @@ class OutputFormatter:
         # 转义HTML字符
         content = html.escape(content)
         
-        # 转换标题
-        content = re.sub(r'^# (.*?)$', r'<h1>\1</h1>', content, flags=re.MULTILINE)
-        content = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', content, flags=re.MULTILINE)
-        content = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', content, flags=re.MULTILINE)
-        
-        # 转换加粗
-        content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', content)
+        # 转换1-3级标题，一次扫描完成
+        content = _MD_HEADING.sub(
+            lambda m: f'<h{len(m.group(1))}>{m.group(2)}</h{len(m.group(1))}>', content
+        )
         
-        # 转换斜体
-        content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', content)
+        # 先转换加粗再转换斜体，避免单个*吃掉后面**的开头
+        content = _MD_BOLD.sub(r'<strong>\1</strong>', content)
+        content = _MD_ITALIC.sub(r'<em>\1</em>', content)
         
         # 转换段落
         paragraphs = content.split('\n\n')
@@ -237,7 +340,7 @@ class OutputFormatter:
             para = para.strip()
             if para:
                 # 检查是否已经是HTML标签
-                if not re.match(r'^<[hH][1-6]>', para):
+                if not _HTML_HEADING_START.match(para):
                     para = f'<p>{para.replace(chr(10), "<br>")}</p>'
                 html_paragraphs.append(para)
         
@@ -246,93 +349,23 @@ class OutputFormatter:
     def _remove_markdown_formatting(self, content: str) -> str:
         """移除Markdown格式标记"""
         # 移除标题标记
-        content = re.sub(r'^#{1,6}\s+', '', content, flags=re.MULTILINE)
+        content = _MD_HEADING_MARK.sub('', content)
         
         # 移除加粗标记
-        content = re.sub(r'\*\*(.*?)\*\*', r'\1', content)
+        content = _MD_BOLD.sub(r'\1', content)
         
         # 移除斜体标记
-        content = re.sub(r'\*(.*?)\*', r'\1', content)
+        content = _MD_ITALIC.sub(r'\1', content)
         
         # 移除链接标记
-        content = re.sub(r'\[([^\]]+)\]\([^\)]+\)', r'\1', content)
+        content = _MD_LINK.sub(r'\1', content)
         
         return content
     
-    def _get_html_styles(self) -> str:
+    @staticmethod
+    def _get_html_styles() -> str:
         """获取HTML样式"""
-        return """
-        body {
-            font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
-            line-height: 1.6;
-            max-width: 800px;
-            margin: 0 auto;
-            padding: 20px;
-            background-color: #f5f5f5;
-        }
-        
-        .metadata {
-            background: #e3f2fd;
-            border-left: 4px solid #2196f3;
-            padding: 15px;
-            margin-bottom: 20px;
-            border-radius: 4px;
-        }
-        
-        .metadata h3 {
-            margin-top: 0;
-            color: #1976d2;
-        }
-        
-        .content {
-            background: white;
-            padding: 30px;
-            border-radius: 8px;
-            box-shadow: 0 2px 10px rgba(0,0,0,0.1);
-            margin-bottom: 20px;
-        }
-        
-        .content h1, .content h2, .content h3 {
-            color: #333;
-            border-bottom: 2px solid #eee;
-            padding-bottom: 10px;
-        }
-        
-        .content p {
-            margin-bottom: 15px;
-            text-align: justify;
-        }
-        
-        .stats {
-            background: #f1f8e9;
-            border-left: 4px solid #8bc34a;
-            padding: 15px;
-            border-radius: 4px;
-        }
-        
-        .stats h3 {
-            margin-top: 0;
-            color: #689f38;
-        }
-        
-        .stat-item {
-            display: inline-block;
-            background: #dcedc8;
-            padding: 5px 10px;
-            border-radius: 15px;
-            margin-right: 10px;
-            font-size: 14px;
-        }
-        
-        a {
-            color: #1976d2;
-            text-decoration: none;
-        }
-        
-        a:hover {
-            text-decoration: underline;
-        }
-        """
+        return _HTML_STYLES
     
     def add_metadata(self, content: str, source_url: str = None, 
                     template: str = None, **kwargs) -> Dict[str, Any]:
@@ -351,8 +384,8 @@ class OutputFormatter:
         metadata = {
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             'char_count': len(content),
-            'word_count': len(content.split()),
-            'line_count': len(content.split('\n'))
+            'word_count': _count_words(content),
+            'line_count': _count_lines(content)
         }
         
         if source_url:
@@ -390,6 +423,12 @@ class OutputFormatter:
 
 
 # 便捷函数
+@lru_cache(maxsize=1)
+def _default_formatter() -> OutputFormatter:
+    """便捷函数共用的格式化器，格式化器不保存调用间的状态，可以复用"""
+    return OutputFormatter()
+
+
 def format_content_output(content: str, format_type: str = "markdown",
                          metadata: Optional[Dict[str, Any]] = None) -> str:
     """
@@ -403,15 +442,7 @@ def format_content_output(content: str, format_type: str = "markdown",
     Returns:
         str: 格式化后的内容
     """
-    formatter = OutputFormatter()
-    
-    # 转换格式类型
-    format_enum = OutputFormat.MARKDOWN
-    if format_type.lower() == "html":
-        format_enum = OutputFormat.HTML
-    elif format_type.lower() == "text":
-        format_enum = OutputFormat.TEXT
-    elif format_type.lower() == "json":
-        format_enum = OutputFormat.JSON
+    # 未知格式按Markdown处理
+    format_enum = FORMAT_MAP.get(format_type.lower(), OutputFormat.MARKDOWN)
     
-    return formatter.format_content(content, format_enum, metadata)
\ No newline at end of file
+    return _default_formatter().format_content(content, format_enum, metadata)
\ No newline at end of file
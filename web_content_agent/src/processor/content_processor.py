@@ -1,11 +1,88 @@
 import re
 import logging
+from dataclasses import dataclass, field
 from typing import Dict, List, Optional, Tuple
-from bs4 import BeautifulSoup, NavigableString, Tag
+from lxml import etree
+import lxml.html
 from urllib.parse import urljoin, urlparse
 
 logger = logging.getLogger(__name__)
 
+# XML声明与unicode输入同时出现时lxml会拒绝解析
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+# 文本清洗和分句
+_WHITESPACE = re.compile(r'\s+')
+_CONTROL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]')
+# 纯ASCII文本用str.translate删除控制字符，比正则快；含中文等非ASCII字符时正则更快
+_CONTROL_CHAR_TABLE = dict.fromkeys([*range(0x00, 0x20), *range(0x7f, 0xa0)])
+# 句子：两个句末标点之间的文本
+_SENTENCE = re.compile(r'[^.!?。！？]+')
+
+# 共享的解析器：解析时直接丢弃注释、处理指令和纯空白文本节点，后续遍历的节点更少
+_HTML_PARSER = lxml.html.HTMLParser(remove_comments=True, remove_pis=True, remove_blank_text=True)
+
+# 正文容器的匹配规则，数字为优先级（越小越优先）
+_CONTENT_TAGS = {'main': 0, 'article': 1}
+_CONTENT_ROLE_MAIN = 2
+_CONTENT_CLASSES = {
+    'content': 3,
+    'main-content': 4,
+    'article-content': 5,
+    'post-content': 6,
+    'entry-content': 7
+}
+_CONTENT_IDS = {'content': 8, 'main-content': 9}
+_CONTENT_PRIORITY_LEVELS = 10
+
+# 标题、描述、关键词所用的meta标签，按优先级排列：(属性名, 属性值)
+_TITLE_METAS = (('property', 'og:title'), ('name', 'title'))
+_DESCRIPTION_METAS = (('name', 'description'), ('property', 'og:description'), ('name', 'summary'))
+_KEYWORDS_METAS = (('name', 'keywords'), ('property', 'article:tag'))
+_META_KEYS = frozenset(_TITLE_METAS + _DESCRIPTION_METAS + _KEYWORDS_METAS)
+
+# 提取的链接和图片数量上限
+_MAX_LINKS = 50
+_MAX_IMAGES = 20
+
+# 段落结构标签
+_PARAGRAPH_TAG_SET = frozenset(('p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'))
+
+
+@dataclass
+class _PageNodes:
+    """单次遍历文档树时收集的节点"""
+    h1: Optional[lxml.html.HtmlElement] = None
+    title: Optional[lxml.html.HtmlElement] = None
+    body: Optional[lxml.html.HtmlElement] = None
+    # (属性名, 属性值) -> 对应meta标签的content列表（缺少content时为None）
+    metas: Dict[Tuple[str, str], List[Optional[str]]] = field(default_factory=dict)
+    links: List[lxml.html.HtmlElement] = field(default_factory=list)
+    images: List[lxml.html.HtmlElement] = field(default_factory=list)
+    # 第一个<base>标签的href
+    base_href: Optional[str] = None
+    # 按优先级分组的正文容器候选
+    content_roots: List[List[lxml.html.HtmlElement]] = field(
+        default_factory=lambda: [[] for _ in range(_CONTENT_PRIORITY_LEVELS)]
+    )
+    # 需要移除的元素（不再遍历其子树）
+    unwanted: List[lxml.html.HtmlElement] = field(default_factory=list)
+    
+    def first_meta(self, key: Tuple[str, str]) -> str:
+        """第一个匹配的meta标签的content"""
+        contents = self.metas.get(key)
+        return (contents[0] or '') if contents else ''
+
+
+def _parse_document(html_content: str) -> lxml.html.HtmlElement:
+    """解析HTML文档"""
+    return lxml.html.document_fromstring(_XML_DECLARATION.sub('', html_content, count=1), parser=_HTML_PARSER)
+
+
+def _element_text(element) -> str:
+    """提取元素内的文本，逐段去除首尾空白后拼接"""
+    return ''.join(text.strip() for text in element.itertext())
+
 
 class ContentProcessor:
     """网页内容处理器，负责HTML解析、文本提取和内容清洗"""
@@ -33,6 +110,14 @@ class ContentProcessor:
             'advertisement', 'comment', 'share', 'social', 'related',
             'recommend', 'popup', 'modal'
         ]
+        
+        # 预先构建标签集合和class关键词正则，遍历时每个元素只做一次查找和一次匹配
+        self._remove_tags_set = frozenset(self.remove_tags)
+        # 与逐个关键词做子串判断等价（包括navbar、comments、site_header这类组合类名）；
+        # re.ASCII保证只按ASCII字母忽略大小写，和先lower()再比较的结果一致
+        self._remove_class_re = re.compile(
+            '|'.join(map(re.escape, self.remove_classes)), re.I | re.ASCII
+        )
     
     def process_html(self, html_content: str, base_url: Optional[str] = None) -> Dict[str, str]:
         """
@@ -46,20 +131,25 @@ class ContentProcessor:
             Dict[str, str]: 包含标题、正文、摘要等信息的字典
         """
         try:
-            # 使用BeautifulSoup解析HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+            # 使用lxml解析HTML
+            tree = _parse_document(html_content)
             
-            # 移除不需要的标签
-            self._remove_unwanted_elements(soup)
+            # 单次遍历收集所需节点，然后移除不需要的标签
+            nodes = self._scan_document(tree)
+            self._remove_unwanted_elements(nodes)
+            
+            # 页面声明了<base href>时，相对链接以它为基准
+            if nodes.base_href:
+                base_url = urljoin(base_url, nodes.base_href) if base_url else nodes.base_href
             
             # 提取页面信息
             result = {
-                'title': self._extract_title(soup),
-                'description': self._extract_description(soup),
-                'main_content': self._extract_main_content(soup),
-                'keywords': self._extract_keywords(soup),
-                'links': self._extract_links(soup, base_url),
-                'images': self._extract_images(soup, base_url)
+                'title': self._extract_title(nodes),
+                'description': self._extract_description(nodes),
+                'main_content': self._extract_main_content(nodes),
+                'keywords': self._extract_keywords(nodes),
+                'links': self._extract_links(nodes, base_url),
+                'images': self._extract_images(nodes, base_url)
             }
             
             # 生成摘要
@@ -81,90 +171,118 @@ class ContentProcessor:
                 'images': []
             }
     
-    def _remove_unwanted_elements(self, soup: BeautifulSoup):
-        """移除不需要的HTML元素"""
-        # 移除指定标签
-        for tag_name in self.remove_tags:
-            for tag in soup.find_all(tag_name):
-                tag.decompose()
-        
-        # 移除包含特定class的元素
-        for element in soup.find_all(class_=True):
-            classes = element.get('class', [])
-            if any(keyword in ' '.join(classes).lower() for keyword in self.remove_classes):
-                element.decompose()
+    def _scan_document(self, tree: lxml.html.HtmlElement) -> _PageNodes:
+        """
+        按文档顺序遍历一次DOM树，收集标题、meta、链接、图片和正文容器
+        
+        需要移除的元素只记录下来，不再进入其子树。
+        """
+        nodes = _PageNodes()
+        remove_tags = self._remove_tags_set
+        remove_class_re = self._remove_class_re
+        stack = [tree]
+        
+        while stack:
+            element = stack.pop()
+            tag = element.tag
+            if not isinstance(tag, str):
+                # 注释、处理指令等非元素节点
+                continue
+            
+            classes = element.get('class')
+            if ((tag in remove_tags or (classes and remove_class_re.search(classes)))
+                    and element.getparent() is not None):
+                nodes.unwanted.append(element)
+                continue
+            
+            if tag == 'a':
+                if element.get('href') is not None:
+                    nodes.links.append(element)
+            elif tag == 'img':
+                # 图片只看src，收集够数量后不再记录
+                if len(nodes.images) < _MAX_IMAGES and (element.get('src') or '').strip():
+                    nodes.images.append(element)
+            elif tag == 'base':
+                if nodes.base_href is None:
+                    nodes.base_href = (element.get('href') or '').strip() or None
+            elif tag == 'meta':
+                for key in (('name', element.get('name')), ('property', element.get('property'))):
+                    if key in _META_KEYS:
+                        nodes.metas.setdefault(key, []).append(element.get('content'))
+            elif tag == 'h1':
+                if nodes.h1 is None:
+                    nodes.h1 = element
+            elif tag == 'title':
+                if nodes.title is None:
+                    nodes.title = element
+            elif tag == 'body':
+                if nodes.body is None:
+                    nodes.body = element
+            
+            # 正文容器候选
+            priority = _CONTENT_TAGS.get(tag)
+            if priority is not None:
+                nodes.content_roots[priority].append(element)
+            if element.get('role') == 'main':
+                nodes.content_roots[_CONTENT_ROLE_MAIN].append(element)
+            if classes:
+                for class_name in set(classes.split()):
+                    priority = _CONTENT_CLASSES.get(class_name)
+                    if priority is not None:
+                        nodes.content_roots[priority].append(element)
+            priority = _CONTENT_IDS.get(element.get('id'))
+            if priority is not None:
+                nodes.content_roots[priority].append(element)
+            
+            # 子节点逆序入栈，保证按文档顺序访问
+            stack.extend(reversed(element))
+        
+        return nodes
     
-    def _extract_title(self, soup: BeautifulSoup) -> str:
+    def _remove_unwanted_elements(self, nodes: _PageNodes):
+        """移除遍历时标记的HTML元素"""
+        for element in nodes.unwanted:
+            element.drop_tree()
+    
+    def _extract_title(self, nodes: _PageNodes) -> str:
         """提取页面标题"""
-        # 优先级：h1 > title > og:title
-        title_selectors = [
-            'h1',
-            'title',
-            'meta[property="og:title"]',
-            'meta[name="title"]'
+        # 标题：h1 > title > og:title > meta title
+        candidates = [
+            nodes.h1.text_content() if nodes.h1 is not None else '',
+            nodes.title.text_content() if nodes.title is not None else ''
         ]
+        candidates.extend(nodes.first_meta(key) for key in _TITLE_METAS)
         
-        for selector in title_selectors:
-            element = soup.select_one(selector)
-            if element:
-                if element.name == 'meta':
-                    title = element.get('content', '').strip()
-                else:
-                    title = element.get_text(strip=True)
-                
-                if title and len(title) > 3:
-                    return self._clean_text(title)
+        for title in candidates:
+            title = title.strip()
+            if title and len(title) > 3:
+                return self._clean_text(title)
         
         return ""
     
-    def _extract_description(self, soup: BeautifulSoup) -> str:
+    def _extract_description(self, nodes: _PageNodes) -> str:
         """提取页面描述"""
-        description_selectors = [
-            'meta[name="description"]',
-            'meta[property="og:description"]',
-            'meta[name="summary"]'
-        ]
-        
-        for selector in description_selectors:
-            element = soup.select_one(selector)
-            if element:
-                description = element.get('content', '').strip()
-                if description and len(description) > 10:
-                    return self._clean_text(description)
+        for key in _DESCRIPTION_METAS:
+            description = nodes.first_meta(key).strip()
+            if description and len(description) > 10:
+                return self._clean_text(description)
         
         return ""
     
-    def _extract_main_content(self, soup: BeautifulSoup) -> str:
+    def _extract_main_content(self, nodes: _PageNodes) -> str:
         """提取主要内容"""
-        # 优先查找常见的内容容器
-        content_selectors = [
-            'main',
-            'article',
-            '[role="main"]',
-            '.content',
-            '.main-content',
-            '.article-content',
-            '.post-content',
-            '.entry-content',
-            '#content',
-            '#main-content'
-        ]
-        
         main_content = ""
         
         # 尝试找到主要内容区域
-        for selector in content_selectors:
-            elements = soup.select(selector)
+        for elements in nodes.content_roots:
             if elements:
                 main_content = self._extract_text_from_elements(elements)
                 if len(main_content) > 100:
                     break
         
         # 如果没有找到明确的内容区域，提取body中的所有文本
-        if len(main_content) < 100:
-            body = soup.find('body')
-            if body:
-                main_content = self._extract_text_from_elements([body])
+        if len(main_content) < 100 and nodes.body is not None:
+            main_content = self._extract_text_from_elements([nodes.body])
         
         # 清洗文本
         main_content = self._clean_text(main_content)
@@ -175,54 +293,72 @@ class ContentProcessor:
         
         return main_content
     
-    def _extract_text_from_elements(self, elements: List[Tag]) -> str:
-        """从HTML元素中提取文本"""
+    def _extract_text_from_elements(self, elements: List[lxml.html.HtmlElement]) -> str:
+        """
+        从HTML元素中提取文本
+        
+        每个元素只遍历一次，以段落结构标签为边界切分文本块，
+        嵌套的段落（如div中的p）不会被重复提取。
+        """
         texts = []
         
         for element in elements:
-            # 处理段落结构
-            paragraphs = element.find_all(['p', 'div', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'li'])
+            blocks = []
+            parts = []
+            has_paragraphs = False
+            
+            for event, node in etree.iterwalk(element, events=('start', 'end')):
+                is_element = isinstance(node.tag, str)
+                
+                # 进入或离开段落结构时结束当前文本块
+                if is_element and node.tag in _PARAGRAPH_TAG_SET and node is not element:
+                    has_paragraphs = True
+                    block = ''.join(parts)
+                    if block:
+                        blocks.append(block)
+                    parts.clear()
+                
+                if event == 'start':
+                    if is_element and node.text:
+                        parts.append(node.text.strip())
+                elif node is not element and node.tail:
+                    parts.append(node.tail.strip())
             
-            if paragraphs:
-                for p in paragraphs:
-                    text = p.get_text(strip=True)
-                    if text and len(text) >= self.min_text_length:
-                        texts.append(text)
-            else:
+            block = ''.join(parts)
+            if block:
+                blocks.append(block)
+            
+            if has_paragraphs:
+                texts.extend(block for block in blocks if len(block) >= self.min_text_length)
+            elif blocks:
                 # 如果没有段落结构，直接提取文本
-                text = element.get_text(strip=True)
-                if text:
-                    texts.append(text)
+                texts.append(''.join(blocks))
         
         return '\n'.join(texts)
     
-    def _extract_keywords(self, soup: BeautifulSoup) -> str:
+    def _extract_keywords(self, nodes: _PageNodes) -> str:
         """提取关键词"""
-        keywords_selectors = [
-            'meta[name="keywords"]',
-            'meta[property="article:tag"]'
-        ]
-        
         keywords = []
         
-        for selector in keywords_selectors:
-            elements = soup.select(selector)
-            for element in elements:
-                content = element.get('content', '').strip()
+        for key in _KEYWORDS_METAS:
+            for content in nodes.metas.get(key, ()):
+                content = (content or '').strip()
                 if content:
                     keywords.extend([kw.strip() for kw in content.split(',')])
         
         return ', '.join(keywords[:10])  # 限制关键词数量
     
-    def _extract_links(self, soup: BeautifulSoup, base_url: Optional[str] = None) -> List[Dict[str, str]]:
+    def _extract_links(self, nodes: _PageNodes, base_url: Optional[str] = None) -> List[Dict[str, str]]:
         """提取页面链接"""
         links = []
         
-        for a_tag in soup.find_all('a', href=True):
+        for a_tag in nodes.links:
             href = a_tag.get('href', '').strip()
-            text = a_tag.get_text(strip=True)
+            if not href:
+                continue
             
-            if href and text:
+            text = _element_text(a_tag)
+            if text:
                 # 处理相对链接
                 if base_url and not href.startswith(('http://', 'https://', '#')):
                     href = urljoin(base_url, href)
@@ -233,32 +369,28 @@ class ContentProcessor:
                 })
                 
                 # 限制链接数量
-                if len(links) >= 50:
+                if len(links) >= _MAX_LINKS:
                     break
         
         return links
     
-    def _extract_images(self, soup: BeautifulSoup, base_url: Optional[str] = None) -> List[Dict[str, str]]:
+    def _extract_images(self, nodes: _PageNodes, base_url: Optional[str] = None) -> List[Dict[str, str]]:
         """提取页面图片"""
         images = []
         
-        for img_tag in soup.find_all('img', src=True):
-            src = img_tag.get('src', '').strip()
+        # 遍历时已过滤空src并截断到_MAX_IMAGES
+        for img_tag in nodes.images:
+            src = img_tag.get('src').strip()
             alt = img_tag.get('alt', '').strip()
             
-            if src:
-                # 处理相对链接
-                if base_url and not src.startswith(('http://', 'https://', 'data:')):
-                    src = urljoin(base_url, src)
-                
-                images.append({
-                    'url': src,
-                    'alt': alt[:100]  # 限制alt文本长度
-                })
-                
-                # 限制图片数量
-                if len(images) >= 20:
-                    break
+            # 处理相对链接
+            if base_url and not src.startswith(('http://', 'https://', 'data:')):
+                src = urljoin(base_url, src)
+            
+            images.append({
+                'url': src,
+                'alt': alt[:100]  # 限制alt文本长度
+            })
         
         return images
     
@@ -267,31 +399,32 @@ class ContentProcessor:
         if not content or len(content) < 50:
             return content
         
-        # 分句
-        sentences = re.split(r'[.!?。！？]', content)
-        
-        summary = ""
-        for sentence in sentences:
-            sentence = sentence.strip()
-            if sentence and len(sentence) > 10:
-                if len(summary + sentence) > max_length:
+        # 逐句扫描，摘要够长后不再分割剩余内容
+        parts = []
+        length = 0
+        for match in _SENTENCE.finditer(content):
+            sentence = match.group().strip()
+            if len(sentence) > 10:
+                if length + len(sentence) > max_length:
                     break
-                summary += sentence + "。"
+                parts.append(sentence)
+                parts.append("。")
+                length += len(sentence) + 1
         
-        return summary.strip()
+        return ''.join(parts)
     
     def _clean_text(self, text: str) -> str:
         """清洗文本内容"""
         if not text:
             return ""
         
-        # 移除多余的空白字符
-        text = re.sub(r'\s+', ' ', text.strip())
-        
-        # 移除特殊字符
-        text = re.sub(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f-\x9f]', '', text)
+        # 合并多余的空白字符
+        text = _WHITESPACE.sub(' ', text.strip())
         
-        return text
+        # 移除特殊字符（\t、\n、\r已在上一步替换为空格）
+        if text.isascii():
+            return text.translate(_CONTROL_CHAR_TABLE)
+        return _CONTROL_CHARS.sub('', text)
     
     def extract_readable_content(self, html_content: str, base_url: Optional[str] = None) -> str:
         """
@@ -1,34 +1,113 @@
 import yaml
 import json
 import os
+import sys
+import copy
 import logging
-from typing import Dict, List, Optional, Any
+import threading
+from string import Formatter
+from collections import ChainMap
+from typing import Dict, Iterator, List, Optional, Any, Tuple
 from pathlib import Path
 
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:  # PyYAML未编译LibYAML扩展时使用纯Python实现
+    from yaml import SafeLoader, SafeDumper
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:  # 可选依赖，未安装时使用标准库json
+    _json_loads = json.loads
+
 logger = logging.getLogger(__name__)
 
+# 模板文件后缀，按加载顺序排列
+_TEMPLATE_SUFFIXES = ('.yaml', '.yml', '.json')
+
+# 已解析的模板文件：绝对路径 -> (修改时间, 文件大小, 模板数据)，文件未变化时不再重新解析；
+# 缓存的是数据而不是模板对象，每次加载都创建新的模板，各管理器互不影响
+_TEMPLATE_CACHE: Dict[str, Tuple[int, int, Dict[str, Any]]] = {}
+
 
 class PromptTemplate:
     """提示词模板类"""
     
+    __slots__ = ('name', 'description', 'system_prompt', 'user_prompt', 'parameters',
+                 '_parsed_prompt', '_content_only', '_content_parts', '_required_fields')
+    
     def __init__(self, name: str, description: str, system_prompt: str, 
                  user_prompt: str, parameters: Optional[Dict[str, Any]] = None):
-        self.name = name
+        # 模板名驻留后，与代码中的字面量（如"summary"）是同一对象，查找模板表时按身份直接命中
+        self.name = sys.intern(name) if isinstance(name, str) else name
         self.description = description
         self.system_prompt = system_prompt
         self.user_prompt = user_prompt
         self.parameters = parameters or {}
+        # 分析结果对应的user_prompt，user_prompt被替换后重新分析
+        self._parsed_prompt = None
+        self._content_only = False
+        # 只有一个{content}时，占位符前后的文本
+        self._content_parts: Optional[Tuple[str, str]] = None
+        self._required_fields: Tuple[str, ...] = ()
+    
+    def _parse_user_prompt(self):
+        """分析user_prompt：是否只有不带格式说明的{content}占位符，以及需要哪些参数"""
+        self._parsed_prompt = self.user_prompt
+        try:
+            fields = [(name, spec, conversion) for _, name, spec, conversion
+                      in Formatter().parse(self.user_prompt) if name is not None]
+        except ValueError:
+            # 模板本身有语法错误，交给format_map报错
+            self._content_only = False
+            self._content_parts = None
+            self._required_fields = ()
+            return
+        
+        # 字段名中.或[之前的部分是参数名；含位置参数（{}、{0}）的模板不预先检查，仍由format_map报错
+        roots = [name.partition('.')[0].partition('[')[0] for name, _, _ in fields]
+        if all(root and not root.isdigit() for root in roots):
+            # content总是提供，不必检查
+            self._required_fields = tuple(root for root in dict.fromkeys(roots) if root != 'content')
+        else:
+            self._required_fields = ()
+        
+        self._content_only = (
+            all(field == ('content', '', None) for field in fields)
+            and '{{' not in self.user_prompt and '}}' not in self.user_prompt
+        )
+        if self._content_only and len(fields) == 1:
+            prefix, _, suffix = self.user_prompt.partition('{content}')
+            self._content_parts = (prefix, suffix)
+        else:
+            self._content_parts = None
     
     def format_user_prompt(self, content: str, **kwargs) -> str:
         """格式化用户提示词"""
-        format_dict = {'content': content}
-        format_dict.update(kwargs)
-        format_dict.update(self.parameters)
+        if self._parsed_prompt is not self.user_prompt:
+            self._parse_user_prompt()
+        
+        # 只有{content}占位符时直接拼接或替换，不必解析格式字符串
+        if self._content_only and 'content' not in self.parameters:
+            if self._content_parts is not None:
+                prefix, suffix = self._content_parts
+                return prefix + content + suffix
+            return self.user_prompt.replace('{content}', content)
         
+        # 预先检查缺少的参数，不必等format_map抛出KeyError
+        parameters = self.parameters
+        for name in self._required_fields:
+            if name not in parameters and name not in kwargs:
+                logger.warning("提示词模板格式化失败，缺少参数: %s", name)
+                return self.user_prompt.replace('{content}', content)
+        
+        # 同名参数的优先级：模板参数 > kwargs > content
         try:
-            return self.user_prompt.format(**format_dict)
+            return self.user_prompt.format_map(ChainMap(parameters, kwargs, {'content': content}))
         except KeyError as e:
-            logger.warning(f"提示词模板格式化失败，缺少参数: {e}")
+            # 嵌套字段（如{item[key]}、格式说明中的{width}）缺少时
+            logger.warning("提示词模板格式化失败，缺少参数: %s", e)
             return self.user_prompt.replace('{content}', content)
     
     def to_dict(self) -> Dict[str, Any]:
@@ -53,62 +132,13 @@ class PromptTemplate:
         )
 
 
-class PromptManager:
-    """提示词管理器，负责管理和加载各种风格的提示词模板"""
-    
-    def __init__(self, templates_dir: str = "config/prompts"):
-        self.templates_dir = Path(templates_dir)
-        self.templates: Dict[str, PromptTemplate] = {}
-        self._load_templates()
-    
-    def _load_templates(self):
-        """从配置目录加载所有模板"""
-        if not self.templates_dir.exists():
-            logger.warning(f"模板目录不存在: {self.templates_dir}")
-            self._create_default_templates()
-            return
-        
-        # 遍历模板目录，加载所有YAML和JSON文件
-        for template_file in self.templates_dir.glob("*.yaml"):
-            self._load_template_file(template_file)
-        
-        for template_file in self.templates_dir.glob("*.yml"):
-            self._load_template_file(template_file)
-        
-        for template_file in self.templates_dir.glob("*.json"):
-            self._load_template_file(template_file)
-        
-        if not self.templates:
-            logger.info("未找到任何模板文件，创建默认模板")
-            self._create_default_templates()
-    
-    def _load_template_file(self, file_path: Path):
-        """加载单个模板文件"""
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                if file_path.suffix in ['.yaml', '.yml']:
-                    data = yaml.safe_load(f)
-                else:
-                    data = json.load(f)
-            
-            template = PromptTemplate.from_dict(data)
-            self.templates[template.name] = template
-            
-            logger.info(f"成功加载模板: {template.name} from {file_path}")
-            
-        except Exception as e:
-            logger.error(f"加载模板文件失败 {file_path}: {str(e)}")
-    
-    def _create_default_templates(self):
-        """创建默认模板"""
-        # 确保目录存在
-        self.templates_dir.mkdir(parents=True, exist_ok=True)
-        
-        # 小红书风格模板
-        xiaohongshu_template = PromptTemplate(
-            name="xiaohongshu",
-            description="小红书图文风格的内容整理",
-            system_prompt="""你是一个专业的内容整理助手，请将网页内容整理成小红书风格的图文内容。
+# 默认模板的数据，模板目录不存在或为空时使用；每个管理器按这些数据创建自己的模板对象
+_DEFAULT_TEMPLATE_DATA: Tuple[Dict[str, Any], ...] = (
+    # 小红书风格模板
+    dict(
+        name="xiaohongshu",
+        description="小红书图文风格的内容整理",
+        system_prompt="""你是一个专业的内容整理助手，请将网页内容整理成小红书风格的图文内容。
 
 要求：
 - 使用活泼生动的语言风格
@@ -124,15 +154,15 @@ class PromptManager:
 - 正文分为3-5个小段落
 - 每段用emoji或小标题开头
 - 结尾可以互动提问或总结""",
-            user_prompt="请将以下网页内容整理成小红书风格的文案：\n\n{content}",
-            parameters={"max_length": 800, "style": "casual"}
-        )
-        
-        # 正式报告风格模板
-        formal_template = PromptTemplate(
-            name="formal",
-            description="正式报告风格的内容整理",
-            system_prompt="""你是一个专业的内容分析师，请将网页内容整理成正式的报告格式。
+        user_prompt="请将以下网页内容整理成小红书风格的文案：\n\n{content}",
+        parameters={"max_length": 800, "style": "casual"}
+    ),
+    
+    # 正式报告风格模板
+    dict(
+        name="formal",
+        description="正式报告风格的内容整理",
+        system_prompt="""你是一个专业的内容分析师，请将网页内容整理成正式的报告格式。
 
 要求：
 - 使用客观、专业的语言
@@ -147,15 +177,15 @@ class PromptManager:
 - 概述：总体介绍
 - 主要内容：分点详述
 - 总结：核心观点汇总""",
-            user_prompt="请将以下网页内容整理成正式报告格式：\n\n{content}",
-            parameters={"max_length": 1200, "style": "formal"}
-        )
-        
-        # 简洁摘要风格模板
-        summary_template = PromptTemplate(
-            name="summary",
-            description="简洁摘要风格的内容整理",
-            system_prompt="""你是一个内容摘要专家，请将网页内容提炼成简洁的摘要。
+        user_prompt="请将以下网页内容整理成正式报告格式：\n\n{content}",
+        parameters={"max_length": 1200, "style": "formal"}
+    ),
+    
+    # 简洁摘要风格模板
+    dict(
+        name="summary",
+        description="简洁摘要风格的内容整理",
+        system_prompt="""你是一个内容摘要专家，请将网页内容提炼成简洁的摘要。
 
 要求：
 - 提取核心要点，去除冗余信息
@@ -168,50 +198,127 @@ class PromptManager:
 - 主要观点必须准确传达
 - 重要数据和结论不可遗漏
 - 保持原文的核心意思""",
-            user_prompt="请将以下网页内容提炼成简洁摘要：\n\n{content}",
-            parameters={"max_length": 500, "style": "summary"}
-        )
+        user_prompt="请将以下网页内容提炼成简洁摘要：\n\n{content}",
+        parameters={"max_length": 500, "style": "summary"}
+    ),
+)
+
+
+class PromptManager:
+    """提示词管理器，负责管理和加载各种风格的提示词模板"""
+    
+    def __init__(self, templates_dir: str = "config/prompts"):
+        self.templates_dir = Path(templates_dir)
+        self.templates: Dict[str, PromptTemplate] = {}
+        self._load_templates()
+    
+    def _load_templates(self):
+        """从配置目录加载所有模板"""
+        if not self.templates_dir.exists():
+            logger.warning("模板目录不存在: %s", self.templates_dir)
+            self._create_default_templates()
+            return
         
-        # 保存默认模板
-        self.templates["xiaohongshu"] = xiaohongshu_template
-        self.templates["formal"] = formal_template
-        self.templates["summary"] = summary_template
+        # 只遍历一次模板目录，收集所有YAML和JSON文件及其匹配到的后缀；
+        # 与glob("*.yaml")等一致，跳过以.开头的隐藏文件
+        template_files = []
+        with os.scandir(self.templates_dir) as entries:
+            for entry in entries:
+                if (entry.name.startswith('.') or not entry.name.endswith(_TEMPLATE_SUFFIXES)
+                        or not entry.is_file()):
+                    continue
+                order, suffix = next((i, suffix) for i, suffix in enumerate(_TEMPLATE_SUFFIXES)
+                                     if entry.name.endswith(suffix))
+                template_files.append((order, suffix, entry.path))
+        
+        # 同名模板按.yaml、.yml、.json的顺序加载，后加载的覆盖先加载的
+        template_files.sort(key=lambda item: item[0])
+        templates = [self._load_template_file(Path(path), suffix) for _, suffix, path in template_files]
+        
+        # 全部解析完后一次性放入模板表
+        self.templates.update((template.name, template) for template in templates if template is not None)
+        
+        if not self.templates:
+            logger.info("未找到任何模板文件，创建默认模板")
+            self._create_default_templates()
+    
+    def _load_template_file(self, file_path: Path, suffix: str) -> Optional[PromptTemplate]:
+        """加载单个模板文件，按扫描时匹配到的后缀选择解析器，失败时返回None"""
+        try:
+            stat = file_path.stat()
+            # 用绝对路径作键，不同工作目录下的相对路径不会混用缓存
+            cache_key = str(file_path.resolve())
+            cached = _TEMPLATE_CACHE.get(cache_key)
+            if cached is not None and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return PromptTemplate.from_dict(copy.deepcopy(cached[2]))
+            
+            if suffix in ('.yaml', '.yml'):
+                # 以二进制读取，由LibYAML直接解码UTF-8
+                with open(file_path, 'rb') as f:
+                    data = yaml.load(f, Loader=SafeLoader)
+            else:
+                # orjson和json.loads都直接接受UTF-8字节
+                data = _json_loads(file_path.read_bytes())
+            
+            template = PromptTemplate.from_dict(data)
+            _TEMPLATE_CACHE[cache_key] = (stat.st_mtime_ns, stat.st_size, copy.deepcopy(data))
+            
+            logger.info("成功加载模板: %s from %s", template.name, file_path)
+            return template
+            
+        except Exception as e:
+            logger.error("加载模板文件失败 %s: %s", file_path, e)
+            return None
+    
+    def _create_default_templates(self):
+        """创建默认模板"""
+        # 确保目录存在
+        self.templates_dir.mkdir(parents=True, exist_ok=True)
         
-        # 将默认模板保存到文件
-        self._save_template_to_file(xiaohongshu_template)
-        self._save_template_to_file(formal_template)
-        self._save_template_to_file(summary_template)
+        for data in _DEFAULT_TEMPLATE_DATA:
+            # 参数字典也复制一份，修改模板参数不会影响之后创建的管理器
+            template = PromptTemplate.from_dict(copy.deepcopy(data))
+            self.templates[template.name] = template
+            # 将默认模板保存到文件
+            self._save_template_to_file(template)
     
     def _save_template_to_file(self, template: PromptTemplate):
         """将模板保存到文件"""
         try:
             file_path = self.templates_dir / f"{template.name}.yaml"
             with open(file_path, 'w', encoding='utf-8') as f:
-                yaml.dump(template.to_dict(), f, default_flow_style=False, allow_unicode=True)
+                yaml.dump(template.to_dict(), f, Dumper=SafeDumper, default_flow_style=False, allow_unicode=True)
+            
+            # 刚写入的文件内容与模板一致，登记到解析缓存，之后加载该目录时不必再读回解析；
+            # 缓存的是数据副本，调用方之后修改自己的模板不会影响缓存
+            stat = file_path.stat()
+            _TEMPLATE_CACHE[str(file_path.resolve())] = (stat.st_mtime_ns, stat.st_size, copy.deepcopy(template.to_dict()))
             
-            logger.info(f"模板已保存: {template.name} -> {file_path}")
+            logger.info("模板已保存: %s -> %s", template.name, file_path)
             
         except Exception as e:
-            logger.error(f"保存模板失败: {str(e)}")
+            logger.error("保存模板失败: %s", e)
     
     def get_template(self, template_name: str) -> Optional[PromptTemplate]:
         """获取指定模板"""
         template = self.templates.get(template_name)
-        if not template:
-            logger.warning(f"未找到模板: {template_name}")
+        if template is None:
+            logger.warning("未找到模板: %s", template_name)
             # 返回默认的简洁摘要模板
             return self.templates.get("summary")
         return template
     
-    def list_templates(self) -> List[Dict[str, str]]:
-        """列出所有可用模板"""
-        return [
-            {
+    def iter_templates(self) -> Iterator[Dict[str, str]]:
+        """逐个生成模板的名称和描述，只遍历一次时不必构建整个列表"""
+        for name, template in self.templates.items():
+            yield {
                 'name': name,
                 'description': template.description
             }
-            for name, template in self.templates.items()
-        ]
+    
+    def list_templates(self) -> List[Dict[str, str]]:
+        """列出所有可用模板"""
+        return list(self.iter_templates())
     
     def add_template(self, template: PromptTemplate, save_to_file: bool = True) -> bool:
         """添加新模板"""
@@ -221,11 +328,11 @@ class PromptManager:
             if save_to_file:
                 self._save_template_to_file(template)
             
-            logger.info(f"成功添加模板: {template.name}")
+            logger.info("成功添加模板: %s", template.name)
             return True
             
         except Exception as e:
-            logger.error(f"添加模板失败: {str(e)}")
+            logger.error("添加模板失败: %s", e)
             return False
     
     def remove_template(self, template_name: str) -> bool:
@@ -239,14 +346,14 @@ class PromptManager:
                 if file_path.exists():
                     file_path.unlink()
                 
-                logger.info(f"成功删除模板: {template_name}")
+                logger.info("成功删除模板: %s", template_name)
                 return True
             else:
-                logger.warning(f"模板不存在: {template_name}")
+                logger.warning("模板不存在: %s", template_name)
                 return False
                 
         except Exception as e:
-            logger.error(f"删除模板失败: {str(e)}")
+            logger.error("删除模板失败: %s", e)
             return False
     
     def create_custom_template(self, name: str, description: str, 
@@ -275,12 +382,10 @@ class PromptManager:
         Returns:
             tuple[str, str]: (系统提示词, 用户提示词)
         """
+        # get_template找不到时已经回退到summary模板，summary也不存在时使用内置的提示词
         template = self.get_template(template_name)
-        if not template:
-            # 使用默认模板
-            template = self.templates.get("summary")
-            if not template:
-                return ("请帮我整理以下内容", f"内容：\n{content}")
+        if template is None:
+            return ("请帮我整理以下内容", f"内容：\n{content}")
         
         system_prompt = template.system_prompt
         user_prompt = template.format_user_prompt(content, **kwargs)
@@ -289,9 +394,25 @@ class PromptManager:
 
 
 # 便捷函数
+_default_manager: Optional[PromptManager] = None
+_default_manager_lock = threading.Lock()
+
+
 def get_default_prompt_manager() -> PromptManager:
-    """获取默认的提示词管理器"""
-    return PromptManager()
+    """获取默认的提示词管理器，进程内只创建一次"""
+    global _default_manager
+    if _default_manager is None:
+        with _default_manager_lock:
+            if _default_manager is None:
+                _default_manager = PromptManager()
+    return _default_manager
+
+
+def reset_default_prompt_manager():
+    """丢弃默认的提示词管理器，下次获取时重新加载模板目录"""
+    global _default_manager
+    with _default_manager_lock:
+        _default_manager = None
 
 
 def format_content_with_template(content: str, template_name: str = "summary", **kwargs) -> tuple[str, str]: